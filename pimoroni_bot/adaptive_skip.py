@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+import math
+import threading
+import time
+
+class AdaptiveFrameSkip:
+    """Sets the Gemini analysis interval from measured latency, error rate and capture fps
+
+    Detections should never be older than target_freshness seconds, so the
+    interval between requests is the freshness budget minus the measured
+    round-trip time. The interval is then bounded by the maximum request
+    rate (we pay per call), stretched while the API is failing, and
+    converted to frames using the measured capture fps. Calls are recorded
+    by the detection worker and frames by the render thread, so every
+    method takes the same lock.
+    """
+
+    def __init__(self, target_freshness=2.0, max_requests_per_second=1.0, min_interval=0.5,
+                 max_interval=30.0, default_fps=30.0, smoothing=0.2):
+        self.target_freshness = target_freshness  # seconds a detection may be old when replaced
+        self.max_requests_per_second = max_requests_per_second
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+
+        # Smoothed measurements
+        self.fps = default_fps
+        self.latency = None
+        self.error_rate = 0.0
+        self.last_frame_time = None
+        self.calls = 0
+        self.errors = 0
+
+        # Current effective values
+        self.interval = target_freshness
+        self.frame_skip = max(1, int(round(target_freshness * default_fps)))
+        self.min_frames = max(1, int(math.ceil(default_fps / max_requests_per_second)))
+
+    def _ewma(self, current, sample):
+        if current is None:
+            return sample
+        return (1 - self.smoothing) * current + self.smoothing * sample
+
+    def record_frame(self, timestamp=None):
+        """Record a captured frame to track the real capture fps"""
+        now = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            if self.last_frame_time is not None:
+                dt = now - self.last_frame_time
+                # Ignore pauses (e.g. nobody watching) so they don't drag the fps down
+                if 0 < dt < 1.0:
+                    self.fps = self._ewma(self.fps, 1.0 / dt)
+            self.last_frame_time = now
+            self._update()
+
+    def record_call(self, latency, ok=True):
+        """Record a finished Gemini request"""
+        with self._lock:
+            self.calls += 1
+            if ok:
+                self.latency = self._ewma(self.latency, latency)
+            else:
+                self.errors += 1
+            self.error_rate = self._ewma(self.error_rate, 0.0 if ok else 1.0)
+            self._update()
+
+    def _update(self):
+        latency = self.latency or 0.0
+
+        # Freshness budget left after the request itself
+        interval = self.target_freshness - latency
+
+        # Never exceed the paid request rate, and never overlap requests
+        interval = max(interval, 1.0 / self.max_requests_per_second, latency)
+
+        # Back off while the API is failing
+        interval /= max(1.0 - self.error_rate, 0.1)
+
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        self.frame_skip = max(1, int(round(self.interval * self.fps)))
+        self.min_frames = max(1, int(math.ceil(self.fps / self.max_requests_per_second)))
+
+    def get_stats(self):
+        """Get current effective values and the measurements behind them"""
+        with self._lock:
+            return {
+                'frame_skip': self.frame_skip,
+                'min_frames': self.min_frames,
+                'interval': round(self.interval, 3),
+                'capture_fps': round(self.fps, 1),
+                'latency': round(self.latency, 3) if self.latency is not None else None,
+                'error_rate': round(self.error_rate, 3),
+                'calls': self.calls,
+                'errors': self.errors,
+                'target_freshness': self.target_freshness,
+                'max_requests_per_second': self.max_requests_per_second
+            }
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+import time
+
+import cv2
+import numpy as np
+
+def gaussian_sigma(strength):
+    """The sigma OpenCV derives for a Gaussian kernel of size `strength`"""
+    return 0.3 * ((strength - 1) * 0.5 - 1) + 0.8
+
+def blur_gaussian(roi, strength):
+    """Exact Gaussian blur (the reference)"""
+    return cv2.GaussianBlur(roi, (strength, strength), 0)
+
+def blur_stack(roi, strength):
+    """Stack blur with the same sigma, cost independent of kernel size"""
+    sigma = gaussian_sigma(strength)
+    radius = int(round(np.sqrt(6 * sigma * sigma + 1) - 1))  # stack kernel variance is r(r+2)/6
+    return cv2.stackBlur(roi, (2 * radius + 1, 2 * radius + 1))
+
+def blur_box(roi, strength, passes=3):
+    """Repeated separable box blur, close to a Gaussian of the same sigma after 3 passes"""
+    sigma = gaussian_sigma(strength)
+    width = int(round(np.sqrt(12 * sigma * sigma / passes + 1))) | 1
+    for _ in range(passes):
+        roi = cv2.blur(roi, (width, width))
+    return roi
+
+def blur_downscale(roi, strength, factor=4):
+    """Gaussian at 1/factor resolution, scaled back up"""
+    height, width = roi.shape[:2]
+    if min(width, height) < 2 * factor:
+        return blur_gaussian(roi, strength)
+    small = cv2.resize(roi, (width // factor, height // factor), interpolation=cv2.INTER_AREA)
+    kernel = max(3, (strength // factor) | 1)
+    small = cv2.GaussianBlur(small, (kernel, kernel), 0)
+    return cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+
+# Backends from closest to the exact Gaussian down; stack blur needs OpenCV 4.7+
+BLUR_BACKENDS = {'gaussian': blur_gaussian, 'box': blur_box}
+if hasattr(cv2, 'stackBlur'):
+    BLUR_BACKENDS['stack'] = blur_stack
+BLUR_BACKENDS['downscale'] = blur_downscale
+
+class BlurBackendSelector:
+    """Picks the best blur backend whose predicted cost fits a per-frame time budget
+
+    Cost is tracked per backend as ms per megapixel (seeded by a small
+    calibration run, then a moving average of real calls), so the choice
+    follows the area to blur: small face boxes get the exact Gaussian,
+    a whole-frame blur falls back to a cheaper backend.
+    """
+
+    def __init__(self, budget_ms=8.0, strength=51, smoothing=0.2):
+        self.budget_ms = budget_ms
+        self.strength = strength
+        self.smoothing = smoothing
+        self.ms_per_mpixel = {}
+        self.chosen = {name: 0 for name in BLUR_BACKENDS}
+        self.over_budget = 0
+
+    def calibrate(self, size=(320, 240)):
+        """Seed per-backend cost from one run on a random image"""
+        image = np.random.RandomState(0).randint(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+        for name, blur in BLUR_BACKENDS.items():
+            blur(image, self.strength)  # first call pays for allocation
+            start = time.perf_counter()
+            blur(image, self.strength)
+            self.record(name, size[0] * size[1], time.perf_counter() - start)
+
+    def predict_ms(self, name, pixels):
+        return self.ms_per_mpixel[name] * pixels / 1e6
+
+    def choose(self, pixels):
+        """Best backend predicted to blur `pixels` within budget (the cheapest if none does)"""
+        if not self.ms_per_mpixel:
+            self.calibrate()
+        for name in BLUR_BACKENDS:
+            if self.predict_ms(name, pixels) <= self.budget_ms:
+                self.chosen[name] += 1
+                return name
+        cheapest = min(BLUR_BACKENDS, key=lambda name: self.ms_per_mpixel[name])
+        self.chosen[cheapest] += 1
+        self.over_budget += 1
+        return cheapest
+
+    def record(self, name, pixels, seconds):
+        """Fold a measured call into the backend's cost per megapixel"""
+        if pixels <= 0:
+            return
+        cost = seconds * 1000 * 1e6 / pixels
+        previous = self.ms_per_mpixel.get(name)
+        self.ms_per_mpixel[name] = cost if previous is None else (1 - self.smoothing) * previous + self.smoothing * cost
+
+    def blur(self, roi, backend='auto', pixels=None):
+        """Blur roi with a named backend, or with the chosen one for 'auto'; returns (blurred, backend)"""
+        area = roi.shape[0] * roi.shape[1]
+        name = self.choose(pixels or area) if backend == 'auto' else backend
+        start = time.perf_counter()
+        blurred = BLUR_BACKENDS[name](roi, self.strength)
+        self.record(name, area, time.perf_counter() - start)
+        return blurred, name
+
+    def get_stats(self):
+        """Get budget, per-backend cost and how often each backend was chosen"""
+        return {
+            'budget_ms': self.budget_ms,
+            'ms_per_mpixel': {name: round(cost, 2) for name, cost in self.ms_per_mpixel.items()},
+            'chosen': dict(self.chosen),
+            'over_budget': self.over_budget
+        }
+
+def benchmark_backends(sizes=((64, 64), (160, 120), (320, 240), (640, 480)), strength=51, repeats=5):
+    """Time every backend at every ROI size, with mean absolute error against the exact Gaussian"""
+    rows = []
+    for width, height in sizes:
+        roi = np.random.RandomState(0).randint(0, 255, (height, width, 3), dtype=np.uint8)
+        reference = blur_gaussian(roi, strength).astype(np.float32)
+        for name, blur in BLUR_BACKENDS.items():
+            blurred = blur(roi, strength)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                blur(roi, strength)
+            rows.append({
+                'backend': name,
+                'size': f"{width}x{height}",
+                'avg_ms': round((time.perf_counter() - start) * 1000 / repeats, 3),
+                'mean_abs_error': round(float(np.abs(blurred.astype(np.float32) - reference).mean()), 2)
+            })
+    return rows
+
+def main():
+    """Print blur backend cost and error per ROI size"""
+    for row in benchmark_backends():
+        print(f"{row['backend']:>9} @ {row['size']:>7}: {row['avg_ms']:8.3f} ms, error {row['mean_abs_error']:.2f}")
+
+if __name__ == "__main__":
+    main()
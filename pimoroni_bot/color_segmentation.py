@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import cv2
+import numpy as np
+
+class ColorSegmenter:
+    """Labels every pixel with its colour class in one vectorized pass over an HSV frame
+
+    Each HSV range becomes one bit. Three 256-entry lookup tables give the
+    bits whose range contains a pixel's H, S and V, and ANDing them leaves
+    the ranges that contain the pixel. A fourth table maps those bits to a
+    class label (1-based, in the order colours were asked for; 0 means no
+    colour), so a prompt naming several colours costs one pass instead of
+    one inRange per range.
+    """
+
+    def __init__(self, color_ranges):
+        self.color_ranges = color_ranges
+        self._tables = {}
+
+    def tables(self, colors):
+        """Channel and label lookup tables for a tuple of colour names (built once per tuple)"""
+        if colors in self._tables:
+            return self._tables[colors]
+
+        ranges = [(label, lower, upper) for label, color in enumerate(colors, 1)
+                  for lower, upper in self.color_ranges.get(color, [])]
+        if len(ranges) > 8:
+            raise ValueError(f"At most 8 HSV ranges can be segmented at once, got {len(ranges)}")
+
+        channel_luts = np.zeros((3, 256), dtype=np.uint8)
+        label_lut = np.zeros(256, dtype=np.uint8)
+        values = np.arange(256)
+        for bit, (label, lower, upper) in enumerate(ranges):
+            for channel in range(3):
+                inside = (values >= lower[channel]) & (values <= upper[channel])
+                channel_luts[channel, inside] |= np.uint8(1 << bit)
+            # A pixel inside several ranges gets the first requested colour
+            hits = ((np.arange(256) & (1 << bit)) != 0) & (label_lut == 0)
+            label_lut[hits] = label
+
+        self._tables[colors] = (channel_luts, label_lut)
+        return self._tables[colors]
+
+    def segment(self, hsv, colors):
+        """Label image (0 = none, i = colors[i - 1]) and pixel count per colour"""
+        colors = tuple(colors)
+        channel_luts, label_lut = self.tables(colors)
+        h, s, v = cv2.split(hsv)
+        bits = cv2.bitwise_and(cv2.LUT(h, channel_luts[0]), cv2.LUT(s, channel_luts[1]))
+        bits = cv2.bitwise_and(bits, cv2.LUT(v, channel_luts[2]))
+        labels = cv2.LUT(bits, label_lut)
+        counts = np.bincount(labels.ravel(), minlength=len(colors) + 1)
+        return labels, {color: int(counts[label]) for label, color in enumerate(colors, 1)}
+
+    def contours(self, labels, colors, counts=None):
+        """External contours of each colour class of a label image (classes counted empty are skipped)"""
+        found = {}
+        for label, color in enumerate(colors, 1):
+            if counts is not None and not counts.get(color):
+                found[color] = []
+                continue
+            mask = cv2.compare(labels, label, cv2.CMP_EQ)
+            found[color], _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return found
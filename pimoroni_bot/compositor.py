@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+import time
+
+import cv2
+import numpy as np
+
+from pimoroni_bot.blur_backends import BlurBackendSelector
+
+BLUR_MODES = ('gaussian', 'pixelate', 'black', 'white')
+
+class BlurCompositor:
+    """Blurs every region of a frame in one pass through a single mask
+
+    All boxes are painted into one mask (optionally feathered), the effect
+    is computed once over the bounding union of the boxes and composited
+    back in place. Boxes spread far apart get one effect pass each instead,
+    so cost follows the covered area. Gaussian mode blurs with a fixed
+    backend, or with backend='auto' picks per frame the best one that fits
+    budget_ms. output() copies frames into one reusable buffer, so a
+    returned frame is only valid until the next call.
+    """
+
+    def __init__(self, mode='gaussian', strength=51, pixelation_size=20, feather=0, backend='auto', budget_ms=8.0,
+                 max_union_ratio=2.0):
+        self.mode = mode
+        self.strength = strength
+        self.pixelation_size = pixelation_size
+        self.feather = feather  # mask edge softening in pixels, 0 for a hard edge
+        self.backend = backend  # a BLUR_BACKENDS name or 'auto'
+        self.selector = BlurBackendSelector(budget_ms, strength)
+        self.max_union_ratio = max_union_ratio
+        self.buffer = None
+
+        # Counters
+        self.frames = 0
+        self.effect_passes = 0
+        self.total_time = 0.0
+        self.blurred_pixels = 0
+        self.frame_pixels = 0
+
+    def output(self, frame):
+        """Copy frame into the reusable output buffer and return the buffer"""
+        if self.buffer is None or self.buffer.shape != frame.shape or self.buffer.dtype != frame.dtype:
+            self.buffer = np.empty_like(frame)
+        np.copyto(self.buffer, frame)
+        return self.buffer
+
+    def effect(self, roi, mode, backend='gaussian'):
+        """The blurred/pixelated/filled version of one region"""
+        if mode == 'black':
+            return np.zeros_like(roi)
+        if mode == 'white':
+            return np.full_like(roi, 255)
+
+        height, width = roi.shape[:2]
+        if mode == 'pixelate':
+            small = cv2.resize(roi, (max(1, width // self.pixelation_size), max(1, height // self.pixelation_size)),
+                               interpolation=cv2.INTER_AREA)
+            return cv2.resize(small, (width, height), interpolation=cv2.INTER_NEAREST)
+
+        blurred, _ = self.selector.blur(roi, backend)
+        return blurred
+
+    def effect_rects(self, boxes):
+        """One rectangle covering every box, or the boxes themselves when that union is mostly empty"""
+        corners = np.array([(x, y, x + w, y + h) for x, y, w, h in boxes])
+        union = (corners[:, 0].min(), corners[:, 1].min(), corners[:, 2].max(), corners[:, 3].max())
+        union_area = (union[2] - union[0]) * (union[3] - union[1])
+        box_area = ((corners[:, 2] - corners[:, 0]) * (corners[:, 3] - corners[:, 1])).sum()
+        if union_area <= self.max_union_ratio * box_area:
+            return [union]
+        return [tuple(c) for c in corners]
+
+    def apply(self, frame, boxes, mode=None):
+        """Blur every (x, y, w, h) box of frame in place and return frame"""
+        mode = mode or self.mode
+        if mode not in BLUR_MODES:
+            raise ValueError(f"Unknown blur mode '{mode}', expected one of {BLUR_MODES}")
+        start = time.perf_counter()
+        height, width = frame.shape[:2]
+
+        # Clip to the frame and drop empty boxes
+        clipped = []
+        for x, y, w, h in boxes:
+            x1, y1 = max(0, int(x)), max(0, int(y))
+            x2, y2 = min(width, int(x + w)), min(height, int(y + h))
+            if x2 > x1 and y2 > y1:
+                clipped.append((x1, y1, x2 - x1, y2 - y1))
+        if not clipped:
+            return frame
+
+        rects = self.effect_rects(clipped)
+        backend = self.backend
+        if mode == 'gaussian' and backend == 'auto':
+            # One backend per frame, sized to everything this frame has to blur
+            backend = self.selector.choose(sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in rects))
+
+        for x1, y1, x2, y2 in rects:
+            # Grow by the feather width so the soft edge falls outside the boxes
+            pad = self.feather
+            x1, y1 = max(0, x1 - pad), max(0, y1 - pad)
+            x2, y2 = min(width, x2 + pad), min(height, y2 + pad)
+
+            # Mask of every box inside this rectangle, in rectangle coordinates
+            mask = np.zeros((y2 - y1, x2 - x1), dtype=np.uint8)
+            for bx, by, bw, bh in clipped:
+                mask[max(0, by - pad - y1):max(0, by + bh + pad - y1), max(0, bx - pad - x1):max(0, bx + bw + pad - x1)] = 255
+            if not mask.any():
+                continue
+
+            roi = frame[y1:y2, x1:x2]
+            blurred = self.effect(roi, mode, backend)
+            if self.feather:
+                alpha = cv2.GaussianBlur(mask, (2 * self.feather + 1, 2 * self.feather + 1), 0).astype(np.float32) / 255.0
+                roi[:] = cv2.blendLinear(blurred, roi, alpha, 1.0 - alpha)
+            else:
+                np.copyto(roi, blurred, where=mask[:, :, None].astype(bool) if roi.ndim == 3 else mask.astype(bool))
+            self.effect_passes += 1
+            self.blurred_pixels += roi.shape[0] * roi.shape[1]
+
+        self.frames += 1
+        self.frame_pixels += width * height
+        self.total_time += time.perf_counter() - start
+        return frame
+
+    def get_stats(self):
+        """Get compositing cost and how much of each frame went through the effect"""
+        return {
+            'mode': self.mode,
+            'feather': self.feather,
+            'backend': self.backend,
+            'backends': self.selector.get_stats(),
+            'frames': self.frames,
+            'effect_passes': self.effect_passes,
+            'avg_ms': round(1000 * self.total_time / self.frames, 2) if self.frames else 0.0,
+            'avg_area_fraction': round(self.blurred_pixels / self.frame_pixels, 3) if self.frame_pixels else 0.0
+        }
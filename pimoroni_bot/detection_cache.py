@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+
+def perceptual_hash(frame, hash_size=8):
+    """64-bit difference hash (dHash) of a downscaled grayscale frame"""
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+def hamming_distance(a, b):
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count('1')
+
+def normalize_prompt(prompt):
+    """Case/whitespace/punctuation-insensitive form of a prompt"""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', prompt.lower()).split())
+
+class DetectionCache:
+    """Bounded LRU/TTL cache of detections keyed on (normalized prompt, perceptual hash)
+
+    Near-duplicate frames (hash within max_distance bits) reuse each other's
+    detections; frames that look different miss even if they are close in
+    time. A subject appearing in a static scene flips only a few of the 64
+    bits (none for a small face on a busy background), so the tolerance is
+    kept small and callers bypass the cache when motion triggered the lookup.
+    """
+
+    def __init__(self, max_entries=64, ttl=10.0, max_distance=2):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key_for(self, frame, prompt):
+        """Cache key for a frame/prompt pair"""
+        return normalize_prompt(prompt), perceptual_hash(frame)
+
+    def get(self, key):
+        """Return cached detections for the key or a near-duplicate frame, or None"""
+        prompt_key, frame_hash = key
+        now = time.time()
+        with self._lock:
+            # Drop expired entries
+            for stale_key in [k for k, (ts, _) in self._entries.items() if now - ts >= self.ttl]:
+                del self._entries[stale_key]
+                self.expirations += 1
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][1]
+
+            best_key, best_distance = None, self.max_distance + 1
+            for (cached_prompt, cached_hash) in self._entries:
+                if cached_prompt != prompt_key:
+                    continue
+                distance = hamming_distance(frame_hash, cached_hash)
+                if distance < best_distance:
+                    best_key, best_distance = (cached_prompt, cached_hash), distance
+
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+                self.hits += 1
+                self.near_hits += 1
+                return self._entries[best_key][1]
+
+            self.misses += 1
+            return None
+
+    def put(self, key, detections):
+        """Store detections, evicting the least recently used entries beyond max_entries"""
+        with self._lock:
+            self._entries[key] = (time.time(), detections)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self):
+        """Get hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'near_hits': self.near_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+class DetectionWorker(threading.Thread):
+    """Background detector with a one-slot "latest frame" inbox
+
+    The render path submits frames without blocking; if the detector is
+    still busy, the pending frame is replaced so the worker always picks up
+    the newest one. Finished detections are published with timestamps and
+    the render path applies them to whatever frame is current.
+    """
+
+    def __init__(self, detect_fn, name='detection-worker', partial_results=False):
+        super().__init__(name=name, daemon=True)
+        self.detect_fn = detect_fn
+        # detect_fn(frame, prompt, on_partial, **options) may publish detections before it returns
+        self.partial_results = partial_results
+        self._condition = threading.Condition()
+        self._inbox = None
+        self.running = False
+        self.busy = False
+
+        # Latest published result
+        self.result = None
+        self.result_seq = 0
+
+        # Stats
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_latency = 0.0
+        self.last_queue_age = 0.0
+        self.partial_results_published = 0
+        self.total_first_result_latency = 0.0
+
+    def submit(self, frame, prompt, **options):
+        """Hand a frame to the worker, replacing any frame still waiting in the inbox
+
+        options are passed on to detect_fn as keyword arguments.
+        """
+        with self._condition:
+            if self._inbox is not None:
+                self.dropped += 1
+            self._inbox = {
+                'frame': frame.copy(),
+                'prompt': prompt,
+                'options': options,
+                'submitted_at': time.time()
+            }
+            self.submitted += 1
+            self._condition.notify()
+
+    def run(self):
+        self.running = True
+        while self.running:
+            with self._condition:
+                self._condition.wait_for(lambda: self._inbox is not None or not self.running, 0.5)
+                job = self._inbox
+                self._inbox = None
+                if job is None:
+                    continue
+                self.busy = True
+
+            started_at = time.time()
+            with self._condition:
+                self.last_queue_age = started_at - job['submitted_at']
+            try:
+                if self.partial_results:
+                    # Streaming detectors hand over detections as they arrive
+                    detections = self.detect_fn(job['frame'], job['prompt'],
+                                                lambda partial: self._publish(job, partial, final=False),
+                                                **job['options'])
+                else:
+                    detections = self.detect_fn(job['frame'], job['prompt'], **job['options'])
+            except Exception as e:
+                print(f"❌ Detection worker failed: {e}")
+                with self._condition:
+                    self.failed += 1
+                    self.busy = False
+                continue
+
+            self._publish(job, detections, final=True)
+
+    def _publish(self, job, detections, final=True):
+        """Make a (partial or final) detection result visible to the render path"""
+        now = time.time()
+        with self._condition:
+            self.result_seq += 1
+            self.result = {
+                'seq': self.result_seq,
+                'detections': list(detections),
+                'prompt': job['prompt'],
+                'frame': job['frame'],
+                'frame_shape': job['frame'].shape,
+                'submitted_at': job['submitted_at'],
+                'timestamp': now,
+                'partial': not final
+            }
+            if final:
+                self.completed += 1
+                self.total_latency += now - job['submitted_at']
+                self.busy = False
+            elif job.get('first_result_at') is None:
+                job['first_result_at'] = now
+                self.partial_results_published += 1
+                self.total_first_result_latency += now - job['submitted_at']
+
+    def stop(self):
+        """Stop the worker after the current detection finishes"""
+        with self._condition:
+            self.running = False
+            self._condition.notify()
+
+    def is_idle(self):
+        """True when nothing is running and nothing is waiting in the inbox"""
+        with self._condition:
+            return not self.busy and self._inbox is None
+
+    def get_result(self):
+        """Get the most recent detection result (or None)"""
+        with self._condition:
+            return self.result
+
+    def get_stats(self):
+        """Get inbox age, result staleness and throughput stats"""
+        now = time.time()
+        with self._condition:
+            return {
+                'busy': self.busy,
+                'submitted': self.submitted,
+                'dropped': self.dropped,
+                'completed': self.completed,
+                'failed': self.failed,
+                'inbox_age': now - self._inbox['submitted_at'] if self._inbox else 0.0,
+                'last_queue_age': self.last_queue_age,
+                'avg_latency': self.total_latency / self.completed if self.completed else 0.0,
+                'avg_first_result_latency': (self.total_first_result_latency / self.partial_results_published
+                                             if self.partial_results_published else None),
+                'result_staleness': now - self.result['timestamp'] if self.result else None,
+                'result_frame_age': now - self.result['submitted_at'] if self.result else None
+            }
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+# Haar cascades shipped with OpenCV, by registry name
+CASCADE_FILES = {
+    'face': 'haarcascade_frontalface_default.xml',
+    'eye': 'haarcascade_eye.xml',
+    'body': 'haarcascade_fullbody.xml'
+}
+
+# Smallest face to find, as a fraction of frame height. The default is 24 px at 480p, what a
+# full-resolution pass finds, so faces run at full width on a 640x480 stream; 0.1 lets them
+# drop to 320 px at the cost of missing faces under 48 px.
+FACE_MIN_SIZE = float(os.getenv('FACE_MIN_SIZE', '0.05'))
+
+# Expected subject height as a fraction of frame height, and the cascade's training window (w, h)
+DETECTION_PROFILES = {
+    'face': {'min_size': FACE_MIN_SIZE, 'max_size': 0.9, 'window': (24, 24)},
+    'eye': {'min_size': 0.03, 'max_size': 0.25, 'window': (20, 20)},
+    'body': {'min_size': 0.3, 'max_size': 1.0, 'window': (14, 28)}
+}
+
+# Width detection runs at, independent of the stream resolution
+DEFAULT_DETECTION_WIDTH = int(os.getenv('DETECTION_WIDTH', '320'))
+
+def _rss_bytes():
+    """Current resident set size, or None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class DetectorRegistry:
+    """Loads each cascade once per thread and hands the same instance back on every call
+
+    CascadeClassifier.detectMultiScale is not safe to call concurrently on
+    one instance, so every thread (stream processing, Gemini worker, upload
+    handlers) gets its own copy, loaded on first use. Load time and memory
+    growth are summed per cascade; only the most recent loads are kept in
+    full, since a threaded web server loads again in every request thread.
+    """
+
+    def __init__(self, cascade_files=None, history=50):
+        self.cascade_files = dict(cascade_files or CASCADE_FILES)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.loads = deque(maxlen=history)  # most recent load records
+        self.load_totals = {}  # name -> loads, load time and memory over all threads
+        self.costs = {}  # (name, detection width) -> [calls, total seconds]
+
+    def _load(self, name):
+        path = self.cascade_files[name]
+        if not os.path.isabs(path):
+            path = os.path.join(cv2.data.haarcascades, path)
+
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        cascade = cv2.CascadeClassifier(path)
+        load_ms = (time.perf_counter() - start) * 1000
+        rss_after = _rss_bytes()
+        if cascade.empty():
+            raise RuntimeError(f"Could not load cascade '{name}' from {path}")
+
+        record = {
+            'name': name,
+            'thread': threading.current_thread().name,
+            'load_ms': round(load_ms, 2),
+            'file_bytes': os.path.getsize(path),
+            'rss_delta_bytes': rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        }
+        with self._lock:
+            self.loads.append(record)
+            totals = self.load_totals.setdefault(name, {'loads': 0, 'total_load_ms': 0.0, 'file_bytes': record['file_bytes'],
+                                                        'rss_delta_bytes': 0, 'last_thread': None})
+            totals['loads'] += 1
+            totals['total_load_ms'] = round(totals['total_load_ms'] + record['load_ms'], 2)
+            totals['rss_delta_bytes'] += record['rss_delta_bytes'] or 0
+            totals['last_thread'] = record['thread']
+        return cascade, record
+
+    def _cascades(self):
+        cascades = getattr(self._local, 'cascades', None)
+        if cascades is None:
+            cascades = self._local.cascades = {}
+        return cascades
+
+    def get(self, name):
+        """The calling thread's instance of a cascade, loaded on first use"""
+        cascades = self._cascades()
+        if name not in cascades:
+            cascades[name], _ = self._load(name)
+        return cascades[name]
+
+    def preload(self, names=None):
+        """Load cascades for the calling thread now and print what it cost"""
+        cascades = self._cascades()
+        for name in names or self.cascade_files:
+            if name in cascades:
+                continue
+            cascades[name], record = self._load(name)
+            rss = record['rss_delta_bytes']
+            memory = f", +{rss / 1024 / 1024:.1f} MB RSS" if rss is not None else ""
+            print(f"Loaded {name} cascade in {record['load_ms']:.1f} ms "
+                  f"({record['file_bytes'] / 1024:.0f} KB file{memory}) [{record['thread']}]")
+
+    def detection_scale(self, name, frame_shape, detection_width=None):
+        """Downscale factor for a detector: detection_width, but never so small that the
+        smallest expected subject drops below the cascade window"""
+        height, width = frame_shape[:2]
+        profile = DETECTION_PROFILES.get(name, {'min_size': 0.0, 'window': (1, 1)})
+        scale = (detection_width or DEFAULT_DETECTION_WIDTH) / float(width)
+        smallest = profile['min_size'] * height
+        if smallest > 0:
+            scale = max(scale, profile['window'][1] / smallest)
+        return min(scale, 1.0)
+
+    def detect_at(self, name, gray, scale, margin=0.1, scale_factor=1.3, min_neighbors=5, resize=None):
+        """Run a cascade on gray downscaled by `scale`, returns boxes in full-frame pixels"""
+        height, width = gray.shape[:2]
+        det_width, det_height = max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+        start = time.perf_counter()
+        if scale < 1.0:
+            small = resize(det_width) if resize else cv2.resize(gray, (det_width, det_height), interpolation=cv2.INTER_AREA)
+        else:
+            small = gray
+
+        # Search only the sizes the expected subjects can have at this scale
+        profile = DETECTION_PROFILES.get(name)
+        kwargs = {}
+        if profile:
+            win_w, win_h = profile['window']
+            min_h = max(win_h, int(profile['min_size'] * det_height))
+            max_h = max(min_h, int(profile['max_size'] * det_height))
+            kwargs['minSize'] = (int(min_h * win_w / win_h), min_h)
+            kwargs['maxSize'] = (int(max_h * win_w / win_h), max_h)
+        found = self.get(name).detectMultiScale(small, scale_factor, min_neighbors, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            cost = self.costs.setdefault((name, small.shape[1]), [0, 0.0])
+            cost[0] += 1
+            cost[1] += elapsed
+
+        # Back to frame coordinates, grown by a margin to cover the rounding of the small image
+        boxes = []
+        for (x, y, w, h) in np.asarray(found).reshape(-1, 4) / (small.shape[1] / float(width)):
+            pad_x, pad_y = w * margin, h * margin
+            x1, y1 = max(0, int(x - pad_x)), max(0, int(y - pad_y))
+            x2, y2 = min(width, int(np.ceil(x + w + pad_x))), min(height, int(np.ceil(y + h + pad_y)))
+            boxes.append((x1, y1, x2 - x1, y2 - y1))
+        return boxes
+
+    def detect(self, name, gray, detection_width=None, **kwargs):
+        """Detect with a cascade at the configured detection resolution, boxes in frame pixels"""
+        return self.detect_at(name, gray, self.detection_scale(name, gray.shape, detection_width), **kwargs)
+
+    def get_cost_stats(self):
+        """Average detectMultiScale cost (including the downscale) per detector and width"""
+        with self._lock:
+            return {
+                f"{name}@{width}": {'calls': calls, 'avg_ms': round(total * 1000 / calls, 2)}
+                for (name, width), (calls, total) in sorted(self.costs.items())
+            }
+
+    def get_stats(self):
+        """Get per-cascade load counts, times and memory"""
+        with self._lock:
+            stats = {name: dict(totals) for name, totals in self.load_totals.items()}
+        return {'loads': stats, 'costs': self.get_cost_stats()}
+
+# One registry for the whole process
+_registry = DetectorRegistry()
+
+def get_registry():
+    """The process-wide detector registry"""
+    return _registry
+
+def get_cascade(name):
+    """Shortcut for the calling thread's instance of a cascade"""
+    return _registry.get(name)
+
+def detect(name, gray, detection_width=None, **kwargs):
+    """Shortcut for DetectorRegistry.detect on the process-wide registry"""
+    return _registry.detect(name, gray, detection_width, **kwargs)
+
+def benchmark_scales(frame, names=None, widths=(160, 240, 320, 480, 640), repeats=5):
+    """Time each detector at each detection width on one frame, returns a list of rows"""
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    rows = []
+    for name in names or list(CASCADE_FILES):
+        for width in widths:
+            scale = min(width / float(gray.shape[1]), 1.0)
+            _registry.detect_at(name, gray, scale)  # warm-up
+            start = time.perf_counter()
+            for _ in range(repeats):
+                boxes = _registry.detect_at(name, gray, scale)
+            rows.append({
+                'detector': name,
+                'width': int(round(gray.shape[1] * scale)),
+                'avg_ms': round((time.perf_counter() - start) * 1000 / repeats, 2),
+                'detections': len(boxes)
+            })
+    return rows
+
+def main():
+    """Print per-detector cost at each detection width for an image or a camera frame"""
+    if len(sys.argv) > 1:
+        frame = cv2.imread(sys.argv[1])
+    else:
+        cap = cv2.VideoCapture(0)
+        _, frame = cap.read()
+        cap.release()
+    if frame is None:
+        print("❌ No frame to benchmark")
+        return
+
+    print(f"Frame: {frame.shape[1]}x{frame.shape[0]}")
+    for row in benchmark_scales(frame):
+        print(f"{row['detector']:>5} @ {row['width']:>4}px: {row['avg_ms']:7.2f} ms, {row['detections']} detections")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+import cv2
+
+class FrameFeatures:
+    """Derived images of one frame, each computed on first use and then shared
+
+    Every detector working on the same frame reads gray, HSV, edges and
+    downscaled gray levels from here, so each one is computed at most once
+    per frame no matter which detectors the prompt asks for.
+    """
+
+    def __init__(self, frame, canny_low=50, canny_high=150):
+        self.frame = frame
+        self.canny_low = canny_low
+        self.canny_high = canny_high
+        self._cache = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.timings = {}  # feature name -> ms spent computing it
+
+    def _get(self, key, compute):
+        if key in self._cache:
+            return self._cache[key]
+        # Detectors may run on several threads: the first one computes, the others wait for it
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._cache:
+                start = time.perf_counter()
+                self._cache[key] = compute()
+                self.timings[key if isinstance(key, str) else f"{key[0]}@{key[1]}"] = (time.perf_counter() - start) * 1000
+        return self._cache[key]
+
+    @property
+    def gray(self):
+        if self.frame.ndim == 2:
+            return self.frame
+        return self._get('gray', lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def hsv(self):
+        return self._get('hsv', lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV))
+
+    @property
+    def edges(self):
+        return self._get('edges', lambda: cv2.Canny(self.gray, self.canny_low, self.canny_high))
+
+    def gray_at(self, width):
+        """Gray downscaled to `width` (aspect kept), shared by every detector running at that width"""
+        gray = self.gray
+        if width >= gray.shape[1]:
+            return gray
+
+        def compute():
+            height = max(1, int(round(gray.shape[0] * width / float(gray.shape[1]))))
+            return cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+        return self._get(('gray', width), compute)
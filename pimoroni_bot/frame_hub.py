@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+import cv2
+
+class FrameHub:
+    """Latest-frame-wins broadcast hub shared by every stream consumer"""
+
+    def __init__(self, name='frames'):
+        self.name = name
+        self._condition = threading.Condition()
+        self.frame = None
+        self.seq = 0
+        self.timestamp = 0.0
+        self.closed = False
+        self.subscribers = 0
+
+        # Publish rate, smoothed over recent frames
+        self.fps = 0.0
+
+    def publish(self, frame):
+        """Publish a new frame to every subscriber (frames must not be mutated afterwards)"""
+        with self._condition:
+            now = time.time()
+            if self.timestamp:
+                interval = now - self.timestamp
+                if interval > 0:
+                    self.fps = 0.9 * self.fps + 0.1 * (1.0 / interval) if self.fps else 1.0 / interval
+            self.seq += 1
+            self.frame = frame
+            self.timestamp = now
+            self._condition.notify_all()
+            return self.seq
+
+    def close(self):
+        """Wake up all subscribers and stop their generators"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def get_latest(self):
+        """Return (seq, frame) for the most recent frame without blocking"""
+        with self._condition:
+            return self.seq, self.frame
+
+    def wait_for_frame(self, last_seq=0, timeout=1.0):
+        """Block until a frame newer than last_seq exists, returns (seq, frame) or (last_seq, None) on timeout"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.seq > last_seq or self.closed, timeout)
+            if self.seq > last_seq and self.frame is not None:
+                return self.seq, self.frame
+            return last_seq, None
+
+    def subscribe(self, timeout=1.0):
+        """Yield (seq, frame) pairs, skipping any frames published while the consumer was busy"""
+        with self._condition:
+            self.subscribers += 1
+
+        last_seq = 0
+        try:
+            while not self.closed:
+                seq, frame = self.wait_for_frame(last_seq, timeout)
+                if frame is None:
+                    continue
+                last_seq = seq
+                yield seq, frame
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+    def get_stats(self):
+        """Get hub statistics"""
+        with self._condition:
+            return {
+                'name': self.name,
+                'seq': self.seq,
+                'fps': round(self.fps, 1),
+                'subscribers': self.subscribers,
+                'frame_age': time.time() - self.timestamp if self.timestamp else None
+            }
+
+class CaptureThread(threading.Thread):
+    """Dedicated thread that owns the camera and publishes each frame once"""
+
+    def __init__(self, hub, camera_index=0, retry_delay=0.5):
+        super().__init__(name='capture', daemon=True)
+        self.hub = hub
+        self.camera_index = camera_index
+        self.retry_delay = retry_delay
+        self.running = False
+        self.read_failures = 0
+
+    def run(self):
+        self.running = True
+        cap = cv2.VideoCapture(self.camera_index)
+        if not cap.isOpened():
+            print(f"❌ Cannot open camera {self.camera_index}")
+
+        try:
+            while self.running:
+                ret, frame = cap.read()
+                if not ret:
+                    # Camera hiccup: back off instead of spinning, consumers keep the last frame
+                    self.read_failures += 1
+                    time.sleep(self.retry_delay)
+                    continue
+                self.hub.publish(frame)
+        finally:
+            cap.release()
+
+    def stop(self):
+        """Stop capturing and release the camera"""
+        self.running = False
+
+class ProcessingThread(threading.Thread):
+    """Blurs and JPEG-encodes each captured frame once and fans the bytes out to every viewer"""
+
+    def __init__(self, source_hub, output_hub, process_fn, jpeg_quality=95, on_start=None):
+        super().__init__(name='processing', daemon=True)
+        self.source_hub = source_hub
+        self.output_hub = output_hub
+        self.process_fn = process_fn
+        self.on_start = on_start  # called once on this thread, e.g. to load per-thread models
+        self.jpeg_quality = jpeg_quality
+        self.running = False
+        self.frames_processed = 0
+        self.process_time = 0.0
+
+    def run(self):
+        self.running = True
+        if self.on_start:
+            self.on_start()
+        last_seq = 0
+        while self.running:
+            # Nobody is watching: don't spend CPU on blur/encode
+            if self.output_hub.subscribers == 0:
+                time.sleep(0.05)
+                continue
+
+            last_seq, frame = self.source_hub.wait_for_frame(last_seq)
+            if frame is None:
+                continue
+
+            start = time.time()
+            try:
+                # Captured frames are shared, so process a private copy
+                processed = self.process_fn(frame.copy())
+                ret, buffer = cv2.imencode('.jpg', processed, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            except Exception as e:
+                print(f"❌ Frame processing failed: {e}")
+                continue
+            if not ret:
+                continue
+
+            # One immutable multipart chunk shared by every client generator
+            chunk = (b'--frame\r\n'
+                     b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+            self.output_hub.publish(chunk)
+
+            self.frames_processed += 1
+            self.process_time += time.time() - start
+
+    def stop(self):
+        """Stop processing frames"""
+        self.running = False
+
+    def get_stats(self):
+        """Get per-frame processing cost"""
+        return {
+            'frames_processed': self.frames_processed,
+            'avg_process_ms': round(1000 * self.process_time / self.frames_processed, 1) if self.frames_processed else 0.0
+        }
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# HTTP/2 needs httpx plus the h2 package; otherwise fall back to a pooled requests.Session
+try:
+    import httpx
+    import h2  # noqa: F401
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+# Connection phases measured by _TimedHTTPSConnection for the request running on this thread
+_phase = threading.local()
+
+def _record_phase(name, seconds):
+    timings = getattr(_phase, 'timings', None)
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    """urllib3 connection that reports connect (DNS plus TCP) and TLS handshake times"""
+
+    def _new_conn(self):
+        # urllib3 resolves and tries every address itself; time the whole thing
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self._new_conn_time = time.perf_counter() - start
+            _record_phase('connect', self._new_conn_time)
+
+    def connect(self):
+        start = time.perf_counter()
+        self._new_conn_time = 0.0
+        super().connect()
+        _record_phase('tls', time.perf_counter() - start - self._new_conn_time)
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class _TimedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': HTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool
+        }
+
+class _StreamedResponse:
+    """Same surface for streamed requests and httpx responses"""
+
+    def __init__(self, response, backend):
+        self.response = response
+        self.backend = backend
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    @property
+    def text(self):
+        if self.backend == 'httpx':
+            self.response.read()
+        return self.response.text
+
+    def iter_lines(self):
+        if self.backend == 'httpx':
+            return self.response.iter_lines()
+        # text/event-stream often comes without a charset, which would leave lines as bytes
+        self.response.encoding = self.response.encoding or 'utf-8'
+        return self.response.iter_lines(decode_unicode=True)
+
+class GeminiHttpClient:
+    """Persistent, pooled HTTP client for the Gemini API
+
+    One keep-alive connection pool is shared by every request, so only the
+    first call (or the background warm-up) pays for DNS, TCP and TLS. Uses
+    httpx with HTTP/2 when available, otherwise a pooled requests.Session.
+    Each request records connect (including DNS) and TLS time (zero on
+    reused connections), time to first byte and body time.
+    """
+
+    def __init__(self, connect_timeout=5.0, read_timeout=15.0, pool_size=4, http2=True, history=100):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self.backend = 'httpx' if http2 and HTTPX_AVAILABLE else 'requests'
+        self.session = self._create_session()
+
+        self._lock = threading.Lock()
+        self.timings = deque(maxlen=history)
+        self.requests = 0
+        self.new_connections = 0
+        self.errors = 0
+        self.warmup_thread = None
+        self.warmed_up = False
+
+    def _create_session(self):
+        if self.backend == 'httpx':
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            return httpx.Client(http2=True, limits=limits, timeout=self._timeout())
+
+        session = requests.Session()
+        adapter = _TimedAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount('https://', adapter)
+        return session
+
+    def _timeout(self):
+        if self.backend == 'httpx':
+            return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+        return (self.connect_timeout, self.read_timeout)
+
+    def _trace(self, phases):
+        """httpcore trace hook filling the connect/TLS phases (DNS is part of connect there)"""
+        started = {}
+
+        def callback(event, info):
+            now = time.perf_counter()
+            for phase, prefix in (('connect', 'connection.connect_tcp'), ('tls', 'connection.start_tls')):
+                if event == prefix + '.started':
+                    started[phase] = now
+                elif event == prefix + '.complete' and phase in started:
+                    phases[phase] = phases.get(phase, 0.0) + now - started[phase]
+        return callback
+
+    def _send(self, method, url, payload=None):
+        """Send a request and return (response, phases) once headers have arrived"""
+        phases = {}
+        start = time.perf_counter()
+        if self.backend == 'httpx':
+            request = self.session.build_request(method, url, json=payload,
+                                                 extensions={'trace': self._trace(phases)})
+            response = self.session.send(request, stream=True)
+        else:
+            _phase.timings = phases
+            try:
+                response = self.session.request(method, url, json=payload, timeout=self._timeout(), stream=True)
+            finally:
+                _phase.timings = None
+        phases['start'] = start
+        phases['headers'] = time.perf_counter()
+        return response, phases
+
+    def _record(self, label, phases, status, body_done=None):
+        start, headers = phases.pop('start'), phases.pop('headers')
+        connection = sum(phases.get(name, 0.0) for name in ('connect', 'tls'))
+        end = body_done or headers
+        timing = {
+            'label': label,
+            'status': status,
+            'reused_connection': connection == 0.0,
+            'connect_ms': round(phases.get('connect', 0.0) * 1000, 2),
+            'tls_ms': round(phases.get('tls', 0.0) * 1000, 2),
+            'ttfb_ms': round(max(headers - start - connection, 0.0) * 1000, 2),
+            'body_ms': round((end - headers) * 1000, 2),
+            'total_ms': round((end - start) * 1000, 2)
+        }
+        with self._lock:
+            self.timings.append(timing)
+            self.requests += 1
+            if not timing['reused_connection']:
+                self.new_connections += 1
+        return timing
+
+    def _read(self, response):
+        """Read the whole body so the connection goes back to the pool"""
+        if self.backend == 'httpx':
+            response.read()
+        else:
+            response.content
+
+    def post(self, url, payload):
+        """POST JSON and read the whole body; the response has status_code, text, json() and headers"""
+        try:
+            response, phases = self._send('POST', url, payload)
+            self._read(response)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        self._record('post', phases, response.status_code, time.perf_counter())
+        return response
+
+    @contextmanager
+    def stream(self, url, payload):
+        """POST JSON and yield the response while its body is still arriving"""
+        try:
+            response, phases = self._send('POST', url, payload)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        try:
+            yield _StreamedResponse(response, self.backend)
+        finally:
+            response.close()
+            self._record('stream', phases, response.status_code, time.perf_counter())
+
+    def warm_up(self, url):
+        """Open a pooled connection to the API host ahead of the first real request"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}/"
+        try:
+            response, phases = self._send('GET', origin)
+            self._read(response)
+            timing = self._record('warmup', phases, response.status_code)
+            self.warmed_up = True
+            print(f"Gemini connection warmed up in {timing['total_ms']:.0f} ms "
+                  f"(connect {timing['connect_ms']:.0f}, tls {timing['tls_ms']:.0f})")
+        except Exception as e:
+            print(f"Gemini warm-up failed: {str(e)}")
+
+    def start_warm_up(self, url):
+        """Warm up in a background thread (once)"""
+        if self.warmed_up or (self.warmup_thread and self.warmup_thread.is_alive()):
+            return
+        self.warmup_thread = threading.Thread(target=self.warm_up, args=(url,), name='gemini-warmup', daemon=True)
+        self.warmup_thread.start()
+
+    def close(self):
+        """Close every pooled connection"""
+        self.session.close()
+        self.warmed_up = False
+
+    def get_stats(self):
+        """Get pool usage and average per-phase timings of recent requests"""
+        with self._lock:
+            recent = [t for t in self.timings if t['label'] != 'warmup']
+            stats = {
+                'backend': self.backend,
+                'http2': self.backend == 'httpx',
+                'connect_timeout': self.connect_timeout,
+                'read_timeout': self.read_timeout,
+                'warmed_up': self.warmed_up,
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'errors': self.errors,
+                'last': self.timings[-1] if self.timings else None
+            }
+        for key in ('connect_ms', 'tls_ms', 'ttfb_ms', 'body_ms', 'total_ms'):
+            stats['avg_' + key] = sum(t[key] for t in recent) / len(recent) if recent else None
+        return stats
@@ -4,12 +4,25 @@ import cv2
 import numpy as np
 import os
 import time
-import requests
 import json
-import base64
 from datetime import datetime
 from dotenv import load_dotenv
 
+from pimoroni_bot.detection_worker import DetectionWorker
+from pimoroni_bot.tracking import BoxTracker
+from pimoroni_bot.motion import MotionGate
+from pimoroni_bot.adaptive_skip import AdaptiveFrameSkip
+from pimoroni_bot.detection_cache import DetectionCache
+from pimoroni_bot.json_stream import IncrementalObjectParser
+from pimoroni_bot.roi_mosaic import RoiMosaic, propose_regions
+from pimoroni_bot.payload_encoder import PayloadEncoder
+from pimoroni_bot.gemini_client import GeminiHttpClient
+from pimoroni_bot.rate_limit import get_api_guard
+from pimoroni_bot.response_store import ResponseStore, request_key
+from pimoroni_bot.detectors import detect, DEFAULT_DETECTION_WIDTH
+from pimoroni_bot.regions import consolidate_boxes
+from pimoroni_bot.compositor import BlurCompositor
+
 # Load environment variables
 load_dotenv()
 
@@ -18,7 +31,9 @@ class GeminiVisionBlur:
     
     def __init__(self):
         # Gemini API configuration
-        self.gemini_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
+        self.gemini_model = "gemini-1.5-flash"
+        self.gemini_url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.gemini_model}:generateContent"
+        self.gemini_stream_url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.gemini_model}:streamGenerateContent"
         self.api_key = os.getenv('GENAPI_API_KEY')  #Using the same key for now
         
         if not self.api_key:
@@ -29,6 +44,7 @@ class GeminiVisionBlur:
         # Blur settings
         self.blur_strength = 51
         self.pixelation_size = 20
+        self.compositor = BlurCompositor('gaussian', self.blur_strength, self.pixelation_size)
         
         # Current prompt and settings
         self.current_prompt = "detect and blur faces, IDs, and sensitive documents"
@@ -40,87 +56,418 @@ class GeminiVisionBlur:
             'documents': 0,
             'sensitive_content': 0
         }
+        # Detections found vs boxes actually blurred after consolidation
+        self.blur_stats = {'detections': 0, 'blurred': 0}
         
         # Recording settings
         self.recording = False
         self.recorded_frames = []
         
-        # Cache for API responses to avoid repeated calls
-        self.detection_cache = {}
+        # Cache for API responses to avoid repeated calls (near-duplicate frames hit)
         self.cache_duration = 10.0  #much longer cache
+        self.detection_cache = DetectionCache(max_entries=64, ttl=self.cache_duration, max_distance=2)
+        # Re-detections triggered by these reasons mean the scene changed, which the frame hash may not show
+        self.cache_bypass_reasons = ('robot_motion', 'large_motion', 'scene_changed', 'new_object')
+        self.batch_size = 4  # Frames packed into one generateContent request by analyze_frames()
+        
+        # Stream responses and blur each detection as soon as its JSON object closes
+        self.streaming_enabled = False
+        self.stream_stats = {
+            'requests': 0,
+            'first_detections': 0,
+            'total_first_detection_latency': 0.0,
+            'total_latency': 0.0
+        }
+        # Structured output: JSON mime type + response schema, one compact array per detection
+        self.structured_output = True
+        self.max_detections = 16  # Enforced by the schema and again when parsing
+        self.compact_types = ['face', 'id', 'document', 'sensitive']  # type codes in compact rows
+        self.api_max_width = 480  # Width of ROI mosaics
+        self.detection_width = DEFAULT_DETECTION_WIDTH  # Haar fallback resolution, separate from the stream
+        
+        # Persistent keep-alive connection pool (HTTP/2 when httpx is installed)
+        self.connect_timeout = 5.0
+        self.read_timeout = 15.0
+        self.http_client = GeminiHttpClient(connect_timeout=self.connect_timeout, read_timeout=self.read_timeout)
+        
+        # Picks upload size/quality/format from bandwidth, latency and result confidence.
+        # Used by whichever thread calls Gemini (the detection worker for live streams);
+        # the render thread only reads its stats, and it locks internally.
+        self.payload_encoder = PayloadEncoder()
+        self.token_stats = {'responses': 0, 'output_tokens': 0}
+        
+        # ROI mode: send only candidate crops (motion, Haar/fallback hits, known boxes) as a mosaic
+        self.roi_enabled = False
+        self.roi_motion_regions = []
+        self.roi_stats = {
+            'mosaic_requests': 0,
+            'full_frame_requests': 0,
+            'regions': 0,
+            'total_area_fraction': 0.0
+        }
         self.frame_skip = 60  #Only analyze every 60 frames (2 seconds at 30fps)
         self.last_analysis_frame = 0
         
+        # Adapts frame_skip to measured Gemini latency, error rate and capture fps. Calls are
+        # recorded by the thread calling Gemini, frames by the render thread; it locks internally.
+        self.skip_controller = AdaptiveFrameSkip(target_freshness=2.0, max_requests_per_second=1.0)
+        
+        # Token bucket + circuit breaker shared with every other GeminiVisionBlur in the process
+        self.api_guard = get_api_guard('gemini', rate=self.skip_controller.max_requests_per_second)
+        
+        # Optional on-disk store of Gemini results for re-processing recordings (see enable_response_store)
+        self.response_store = None
+        if os.getenv('GEMINI_RESPONSE_CACHE'):
+            self.enable_response_store(os.getenv('GEMINI_RESPONSE_CACHE'),
+                                       max_mb=float(os.getenv('GEMINI_RESPONSE_CACHE_MB', '100')),
+                                       replay_only=os.getenv('GEMINI_REPLAY_ONLY', '').lower() in ('1', 'true', 'yes'))
+        
+        # Background detection worker for live streams (see process_frame_async)
+        self.detection_worker = None
+        self.last_applied_result = 0
+        
+        # Keyframe, tracker and motion gate state below belongs to the render thread
+        # (process_frame_async). The worker only reads the keyframe lists for ROI candidates,
+        # and they are replaced, never changed in place.
+        # Keyframe detections for the active prompt
+        self.keyframe_detections = []
+        self.keyframe_prompt = None
+        self.redetect_reasons = {}
+        
+        # Optical-flow tracking between keyframes; the tracker decides when to re-detect
+        self.tracking_enabled = True
+        self.tracker = BoxTracker(max_keyframe_age=self.frame_skip * 5)
+        self.min_redetect_frames = 15  # Never re-detect more often than this, even if tracks are lost
+        
+        # Skip detection while the scene is static; motion, a new object or driving forces a refresh.
+        # Static scenes are still refreshed at least as often as the old fixed 120-frame refresh.
+        self.max_idle_frames = 120
+        self.motion_gate = MotionGate('gemini', max_idle_frames=min(self.frame_skip * 5, self.max_idle_frames))
+        
     def encode_frame_for_api(self, frame):
-        """Encode frame as base64 for API transmission"""
-        # Resize frame to reduce API payload size
-        height, width = frame.shape[:2]
-        if width > 480:  # Smaller size for faster processing
-            scale = 480 / width
-            new_width = int(width * scale)
-            new_height = int(height * scale)
-            frame = cv2.resize(frame, (new_width, new_height))
-        
-        #Encode as JPEG with lower quality for faster transmission
-        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-        jpg_as_text = base64.b64encode(buffer).decode('utf-8')
-        return jpg_as_text
-    
-    def call_gemini_analysis(self, frame, prompt):
-        """Call Gemini API to analyze frame"""
-        if not self.api_key:
-            print("❌ No Gemini API key configured")
-            return []
+        """Encode frame for API transmission, returns (inline_data, scale from upload to frame pixels)"""
+        encoded = self.payload_encoder.encode(frame)
+        inline_data = {
+            "mime_type": encoded['mime_type'],
+            "data": encoded['data']
+        }
+        return inline_data, frame.shape[1] / float(encoded['width'])
+    
+    def payload_bytes(self, payload):
+        """Decoded size of the images in a request"""
+        total = 0
+        for content in payload.get('contents', []):
+            for part in content.get('parts', []):
+                if 'inline_data' in part:
+                    total += len(part['inline_data']['data']) * 3 // 4
+        return total
+    
+    def detection_schema(self):
+        """Response schema for one image: rows of [ymin, xmin, ymax, xmax, type, confidence]"""
+        return {
+            "type": "ARRAY",
+            "maxItems": self.max_detections,
+            "items": {
+                "type": "ARRAY",
+                "minItems": 6,
+                "maxItems": 6,
+                "items": {"type": "INTEGER"}
+            }
+        }
+    
+    def generation_config(self, frames=1):
+        """generationConfig for a request covering the given number of images"""
+        if not self.structured_output:
+            return {
+                "temperature": 0.1,
+                "maxOutputTokens": min(1024 * frames, 8192)
+            }
+        
+        schema = self.detection_schema()
+        if frames > 1:
+            # One detection list per image, in image order
+            schema = {"type": "ARRAY", "minItems": frames, "maxItems": frames, "items": schema}
+        return {
+            "temperature": 0.1,
+            # A compact row is ~20 tokens, so a full list stays well under the old 1024
+            "maxOutputTokens": min(frames * (32 + 24 * self.max_detections), 8192),
+            "responseMimeType": "application/json",
+            "responseSchema": schema
+        }
+    
+    def detection_instructions(self, prompt):
+        """Instruction text describing what to detect and the expected JSON format"""
+        if self.structured_output:
+            type_codes = ', '.join(f"{code}={name}" for code, name in enumerate(self.compact_types))
+            return (f"Detect sensitive content in this image. {prompt} Look specifically for ID cards, passports, "
+                    f"driver's licenses, credit cards, and faces. Return at most {self.max_detections} rows, one per "
+                    f"object: [ymin, xmin, ymax, xmax, type, confidence]. Coordinates are integers normalized to "
+                    f"0-1000 relative to the image size. type is {type_codes}. confidence is 0-100.")
+        return f"Analyze this image and detect sensitive content. {prompt} Look specifically for ID cards, passports, driver's licenses, credit cards, and faces. Return ONLY a JSON response with exact pixel coordinates for bounding boxes. Format: {{\"detections\": [{{\"bbox\": [x, y, width, height], \"type\": \"face|id|document|sensitive\", \"confidence\": 0.0-1.0}}]}} where x,y are top-left corner coordinates and width,height are the dimensions. Be precise with coordinates."
+    
+    def post_generate_content(self, payload):
+        """POST a generateContent request, returns the JSON body or None on failure"""
+        allowed, reason = self.api_guard.acquire()
+        if not allowed:
+            print(f"Gemini request skipped ({reason})")
+            return None
         
+        start_time = time.time()
+        response = None
         try:
-            # Encode frame
-            encoded_frame = self.encode_frame_for_api(frame)
-            
-            # Prepare API request for Gemini
-            payload = {
-                "contents": [
-                    {
-                        "parts": [
-                            {
-                                "text": f"Analyze this image and detect sensitive content. {prompt} Look specifically for ID cards, passports, driver's licenses, credit cards, and faces. Return ONLY a JSON response with exact pixel coordinates for bounding boxes. Format: {{\"detections\": [{{\"bbox\": [x, y, width, height], \"type\": \"face|id|document|sensitive\", \"confidence\": 0.0-1.0}}]}} where x,y are top-left corner coordinates and width,height are the dimensions. Be precise with coordinates."
-                            },
-                            {
-                                "inline_data": {
-                                    "mime_type": "image/jpeg",
-                                    "data": encoded_frame
-                                }
-                            }
-                        ]
-                    }
-                ],
-                "generationConfig": {
-                    "temperature": 0.1,
-                    "maxOutputTokens": 1024
-                }
-            }
-            
-            print(f"Calling Gemini API with prompt: '{prompt}'")
-            
-            # Make API call
             url = f"{self.gemini_url}?key={self.api_key}"
-            response = requests.post(url, json=payload, timeout=15)
+            response = self.http_client.post(url, payload)
+            self.api_guard.record_result(response.status_code, response.headers.get('Retry-After'))
+            self.skip_controller.record_call(time.time() - start_time, ok=response.status_code == 200)
+            self.payload_encoder.record_request(self.payload_bytes(payload), time.time() - start_time,
+                                                ok=response.status_code == 200)
             
             if response.status_code == 200:
-                result = response.json()
                 print(f"Gemini response received")
-                return self.parse_gemini_response(result)
+                body = response.json()
+                self.token_stats['responses'] += 1
+                self.token_stats['output_tokens'] += body.get('usageMetadata', {}).get('candidatesTokenCount', 0)
+                return body
             else:
                 print(f"Gemini error: {response.status_code} - {response.text}")
-                return []
+                return None
                 
         except Exception as e:
+            if response is None:
+                # Request never completed (timeout, connection error)
+                self.skip_controller.record_call(time.time() - start_time, ok=False)
+                self.api_guard.record_result(None, error=str(e))
             print(f"Gemini call failed: {str(e)}")
-            return []
+            return None
     
-    def parse_gemini_response(self, response):
-        """Parse Gemini API response into detection regions"""
+    def call_gemini_streaming(self, payload, frame_shape, on_partial=None, scale=1.0):
+        """POST a streamGenerateContent request, handing over detections as they arrive
+
+        Returns (detections, completed); detections that arrived before a broken
+        stream are still returned, with completed False.
+        """
+        allowed, reason = self.api_guard.acquire()
+        if not allowed:
+            print(f"Gemini request skipped ({reason})")
+            return [], False
+        
+        start_time = time.time()
+        recorded = False
+        response = None
         detections = []
+        if self.structured_output:
+            parser = IncrementalObjectParser(self.is_compact_row, arrays=True)
+        else:
+            parser = IncrementalObjectParser(lambda obj: 'bbox' in obj)
         
+        try:
+            url = f"{self.gemini_stream_url}?alt=sse&key={self.api_key}"
+            with self.http_client.stream(url, payload) as response:
+                self.api_guard.record_result(response.status_code, response.headers.get('Retry-After'))
+                if response.status_code != 200:
+                    self.skip_controller.record_call(time.time() - start_time, ok=False)
+                    recorded = True
+                    print(f"Gemini error: {response.status_code} - {response.text}")
+                    return [], False
+                
+                # Server-sent events: each "data:" line is a partial GenerateContentResponse
+                for line in response.iter_lines():
+                    if not line or not line.startswith('data:'):
+                        continue
+                    chunk = json.loads(line[5:].strip())
+                    for candidate in chunk.get('candidates', [])[:1]:
+                        for part in candidate.get('content', {}).get('parts', []):
+                            rows = parser.feed(part.get('text', ''))[:self.max_detections - len(detections)]
+                            new_detections = self.parse_detection_list(rows, frame_shape, scale)
+                            if not new_detections:
+                                continue
+                            if not detections:
+                                self.stream_stats['first_detections'] += 1
+                                self.stream_stats['total_first_detection_latency'] += time.time() - start_time
+                            detections.extend(new_detections)
+                            if on_partial:
+                                on_partial(detections)
+            
+            latency = time.time() - start_time
+            self.skip_controller.record_call(latency, ok=True)
+            self.payload_encoder.record_request(self.payload_bytes(payload), latency)
+            recorded = True
+            self.stream_stats['requests'] += 1
+            self.stream_stats['total_latency'] += latency
+            print(f"Gemini stream finished: {len(detections)} detections in {latency:.2f}s")
+            return detections, True
+            
+        except Exception as e:
+            if not recorded:
+                self.skip_controller.record_call(time.time() - start_time, ok=False)
+                if response is None:
+                    self.api_guard.record_result(None, error=str(e))
+            # Keep whatever arrived before the stream broke
+            print(f"Gemini stream failed after {len(detections)} detections: {str(e)}")
+        
+        return detections, False
+    
+    def call_gemini_analysis(self, frame, prompt, on_partial=None):
+        """Call Gemini API to analyze frame"""
+        mosaic = self.build_roi_mosaic(frame, prompt) if self.roi_enabled else None
+        image = mosaic.image if mosaic else frame
+        instructions = self.detection_instructions(prompt)
+        if mosaic:
+            instructions = (f"This image is a mosaic of {len(mosaic.tiles)} crops from one camera frame, separated by "
+                            f"gray borders. Report boxes relative to the whole mosaic image. {instructions}")
+            if on_partial:
+                frame_partial = on_partial
+                on_partial = lambda detections: frame_partial(mosaic.map_detections(detections))
+        
+        try:
+            # Encode frame
+            inline_data, scale = self.encode_frame_for_api(image)
+        except Exception as e:
+            print(f"Gemini call failed: {str(e)}")
+            return []
+        
+        # Prepare API request for Gemini
+        payload = {
+            "contents": [
+                {
+                    "parts": [
+                        {
+                            "text": instructions
+                        },
+                        {
+                            "inline_data": inline_data
+                        }
+                    ]
+                }
+            ],
+            "generationConfig": self.generation_config()
+        }
+        
+        store_key = None
+        if self.response_store:
+            store_key = request_key(payload, self.gemini_model)
+            stored = self.response_store.get(store_key)
+            if stored is not None:
+                print("Using stored Gemini response")
+                return self.detections_from_store(stored)
+        
+        if not self.api_key:
+            print("❌ No Gemini API key configured")
+            return []
+        
+        print(f"Calling Gemini API with prompt: '{prompt}'")
+        
+        if self.streaming_enabled:
+            detections, completed = self.call_gemini_streaming(payload, image.shape, on_partial, scale)
+        else:
+            # Make API call
+            result = self.post_generate_content(payload)
+            if result is None:
+                return []
+            detections, completed = self.parse_gemini_response(result, image.shape, scale), True
+        
+        # Only an answered request says anything about image quality; failures must not escalate it
+        if completed:
+            self.payload_encoder.record_detections(detections)
+        
+        if mosaic:
+            detections = mosaic.map_detections(detections)
+        if store_key and completed:
+            self.response_store.put(store_key, detections)
+        return detections
+    
+    def roi_candidates(self, frame, prompt):
+        """Boxes worth sending: motion since the last detection, local detector hits, known objects"""
+        boxes = list(self.roi_motion_regions)
+        boxes.extend(d['bbox'] for d in self.fallback_opencv_detection(frame))
+        if prompt == self.keyframe_prompt:
+            boxes.extend(d['bbox'] for d in self.keyframe_detections)
+        return boxes
+    
+    def build_roi_mosaic(self, frame, prompt):
+        """Pack candidate regions into a mosaic, or None when the whole frame should be sent"""
+        regions = propose_regions(frame.shape, self.roi_candidates(frame, prompt))
+        if not regions:
+            self.roi_stats['full_frame_requests'] += 1
+            return None
+        
+        mosaic = RoiMosaic(frame, regions, width=self.api_max_width)
+        self.roi_stats['mosaic_requests'] += 1
+        self.roi_stats['regions'] += len(regions)
+        self.roi_stats['total_area_fraction'] += mosaic.area_fraction()
+        print(f"Sending {len(regions)} ROI crops ({mosaic.area_fraction():.0%} of frame) as a "
+              f"{mosaic.image.shape[1]}x{mosaic.image.shape[0]} mosaic")
+        return mosaic
+    
+    def call_gemini_batch(self, frames, prompt):
+        """Analyze several frames in one request, returns one detection list per frame"""
+        if not frames:
+            return []
+        
+        # One text label + inline image per frame so results can be keyed by index
+        if self.structured_output:
+            layout = (f"Return one list of rows per image, in image order ({len(frames)} lists), "
+                      f"using an empty list when nothing is found.")
+        else:
+            layout = (f"Return ONLY one JSON object for all images. Format: {{\"images\": [{{\"index\": 0, \"detections\": [...]}}]}} "
+                      f"with one entry per image index, using an empty detections list when nothing is found.")
+        parts = [{
+            "text": f"You are given {len(frames)} images, numbered 0 to {len(frames) - 1} in the order they appear. "
+                    f"For EACH image: {self.detection_instructions(prompt)} {layout}"
+        }]
+        scales = []
+        try:
+            for idx, frame in enumerate(frames):
+                inline_data, scale = self.encode_frame_for_api(frame)
+                scales.append(scale)
+                parts.append({"text": f"Image {idx}:"})
+                parts.append({"inline_data": inline_data})
+        except Exception as e:
+            print(f"Gemini call failed: {str(e)}")
+            return [[] for _ in frames]
+        
+        payload = {
+            "contents": [{"parts": parts}],
+            "generationConfig": self.generation_config(len(frames))
+        }
+        
+        store_key = None
+        if self.response_store:
+            store_key = request_key(payload, self.gemini_model)
+            stored = self.response_store.get(store_key)
+            if stored is not None:
+                print(f"Using stored Gemini response for {len(frames)} frames")
+                return [self.detections_from_store(detections) for detections in stored]
+        
+        if not self.api_key:
+            print("❌ No Gemini API key configured")
+            return [[] for _ in frames]
+        
+        print(f"Calling Gemini API with {len(frames)} frames, prompt: '{prompt}'")
+        
+        result = self.post_generate_content(payload)
+        if result is None:
+            return [[] for _ in frames]
+        per_frame = self.parse_gemini_batch_response(result, [frame.shape for frame in frames], scales)
+        self.payload_encoder.record_detections([d for detections in per_frame for d in detections])
+        if store_key:
+            self.response_store.put(store_key, per_frame)
+        return per_frame
+    
+    def enable_response_store(self, path, max_mb=100, replay_only=False):
+        """Answer byte-identical requests from an on-disk store (replay_only: never call the API)"""
+        self.response_store = ResponseStore(path, max_bytes=int(max_mb * 1024 * 1024), replay_only=replay_only)
+        # Adaptive encoding would change the bytes (and so the key) from run to run
+        self.payload_encoder.adaptive = False
+        print(f"Gemini response store: {path}{' (replay only)' if replay_only else ''}")
+        return self.response_store
+    
+    def detections_from_store(self, stored):
+        """Stored detections come back from JSON with list bboxes"""
+        return [dict(detection, bbox=tuple(detection['bbox'])) for detection in stored]
+    
+    def extract_response_json(self, response):
+        """Pull the JSON object out of a generateContent response body, or None"""
         try:
             if 'candidates' in response and response['candidates']:
                 candidate = response['candidates'][0]
@@ -130,37 +477,125 @@ class GeminiVisionBlur:
                     print(f"Raw Gemini response: {text_response[:200]}...")
                     
                     # Try to extract JSON from response
+                    try:
+                        # JSON mime type responses are the bare document
+                        return json.loads(text_response)
+                    except json.JSONDecodeError:
+                        pass
                     try:
                         # Look for JSON in the response
                         start_idx = text_response.find('{')
                         end_idx = text_response.rfind('}') + 1
                         if start_idx != -1 and end_idx != 0:
                             json_str = text_response[start_idx:end_idx]
-                            parsed = json.loads(json_str)
-                            
-                            if 'detections' in parsed:
-                                for detection in parsed['detections']:
-                                    bbox = detection.get('bbox', [0, 0, 0, 0])
-                                    if len(bbox) == 4:
-                                        # Ensure coordinates are reasonable
-                                        x, y, w, h = bbox
-                                        if 0 <= x <= 1000 and 0 <= y <= 1000 and w > 0 and h > 0:
-                                            detections.append({
-                                                'bbox': tuple(bbox),
-                                                'type': detection.get('type', 'unknown'),
-                                                'confidence': detection.get('confidence', 0.0)
-                                            })
-                                            print(f"Parsed detection: {detection.get('type')} at {bbox}")
-                                        else:
-                                            print(f"Skipping invalid coordinates: {bbox}")
+                            return json.loads(json_str)
                     except json.JSONDecodeError:
                         print(f"Could not parse JSON from Gemini response: {text_response[:100]}...")
                         
         except Exception as e:
             print(f"Error parsing Gemini response: {str(e)}")
         
+        return None
+    
+    def is_compact_row(self, item):
+        """True for a [ymin, xmin, ymax, xmax, type, confidence] row"""
+        return (isinstance(item, list) and len(item) == 6
+                and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in item))
+    
+    def parse_compact_row(self, row, frame_shape):
+        """Convert a normalized compact row into a full-frame pixel detection, or None"""
+        ymin, xmin, ymax, xmax, type_code, confidence = row
+        ymin, xmin = max(0, min(ymin, 1000)), max(0, min(xmin, 1000))
+        ymax, xmax = max(0, min(ymax, 1000)), max(0, min(xmax, 1000))
+        if xmax <= xmin or ymax <= ymin:
+            return None
+        
+        # Normalized coordinates are independent of the upload resize
+        height, width = frame_shape[:2]
+        x, y = int(round(xmin * width / 1000)), int(round(ymin * height / 1000))
+        w, h = int(round((xmax - xmin) * width / 1000)), int(round((ymax - ymin) * height / 1000))
+        type_code = int(type_code)
+        detection_type = self.compact_types[type_code] if 0 <= type_code < len(self.compact_types) else 'sensitive'
+        return {
+            'bbox': (x, y, w, h),
+            'type': detection_type,
+            'confidence': max(0.0, min(confidence / 100.0, 1.0))
+        }
+    
+    def parse_detection_list(self, items, frame_shape=None, scale=1.0):
+        """Validate raw detections from Gemini into full-frame detection regions"""
+        detections = []
+        
+        for detection in items[:self.max_detections]:
+            if self.is_compact_row(detection):
+                if frame_shape is None:
+                    continue
+                parsed = self.parse_compact_row(detection, frame_shape)
+                if parsed:
+                    detections.append(parsed)
+                    print(f"Parsed detection: {parsed['type']} at {parsed['bbox']}")
+                else:
+                    print(f"Skipping invalid coordinates: {detection}")
+                continue
+            if not isinstance(detection, dict):
+                continue
+            
+            bbox = detection.get('bbox', [0, 0, 0, 0])
+            if len(bbox) == 4:
+                # Ensure coordinates are reasonable
+                x, y, w, h = bbox
+                if 0 <= x <= 1000 and 0 <= y <= 1000 and w > 0 and h > 0:
+                    # Pixel coordinates refer to the downscaled upload
+                    detections.append({
+                        'bbox': tuple(int(round(v * scale)) for v in bbox),
+                        'type': detection.get('type', 'unknown'),
+                        'confidence': detection.get('confidence', 0.0)
+                    })
+                    print(f"Parsed detection: {detection.get('type')} at {bbox}")
+                else:
+                    print(f"Skipping invalid coordinates: {bbox}")
+        
         return detections
     
+    def parse_gemini_response(self, response, frame_shape=None, scale=1.0):
+        """Parse Gemini API response into detection regions"""
+        parsed = self.extract_response_json(response)
+        try:
+            if isinstance(parsed, list):
+                return self.parse_detection_list(parsed, frame_shape, scale)
+            if parsed and 'detections' in parsed:
+                return self.parse_detection_list(parsed['detections'], frame_shape, scale)
+        except Exception as e:
+            print(f"Error parsing Gemini response: {str(e)}")
+        return []
+    
+    def parse_gemini_batch_response(self, response, frame_shapes, scales=None):
+        """Parse a multi-image response into one detection list per frame index"""
+        count = len(frame_shapes)
+        scales = scales or [1.0] * count
+        per_frame = [[] for _ in range(count)]
+        parsed = self.extract_response_json(response)
+        if not parsed:
+            return per_frame
+        
+        if isinstance(parsed, list):
+            # Structured layout: one list of compact rows per image, in order
+            entries = [{'index': idx, 'detections': rows} for idx, rows in enumerate(parsed)]
+        else:
+            entries = parsed.get('images', [])
+        
+        for position, entry in enumerate(entries):
+            try:
+                idx = int(entry.get('index', position))
+                if 0 <= idx < count:
+                    per_frame[idx] = self.parse_detection_list(entry.get('detections', []), frame_shapes[idx], scales[idx])
+                else:
+                    print(f"Skipping detections for unknown image index {idx}")
+            except Exception as e:
+                print(f"Error parsing Gemini batch entry: {str(e)}")
+        
+        return per_frame
+    
     def process_detections(self, detections, frame_shape):
         """Process detections into blur regions"""
         blur_regions = []
@@ -188,31 +623,71 @@ class GeminiVisionBlur:
     
     def apply_blur(self, frame, region, blur_type='gaussian'):
         """Apply blur to a specific region"""
-        x, y, w, h = region
+        return self.compositor.apply(frame, [region], blur_type)
+    
+    def analyze_frame(self, frame, prompt, on_partial=None, use_cache=True):
+        """Run (or reuse cached) Gemini detection for a frame, returns (detections, called_api)
         
-        if blur_type == 'gaussian':
-            roi = frame[y:y+h, x:x+w]
-            blurred_roi = cv2.GaussianBlur(roi, (self.blur_strength, self.blur_strength), 0)
-            frame[y:y+h, x:x+w] = blurred_roi
+        use_cache=False skips the lookup (the result is still stored).
+        """
+        cache_key = self.detection_cache.key_for(frame, prompt)
+        cached_detections = self.detection_cache.get(cache_key) if use_cache else None
+        if cached_detections is not None:
+            print(f"Using cached detection for frame {self.frame_count}")
+            return cached_detections, False
         
-        elif blur_type == 'pixelate':
-            roi = frame[y:y+h, x:x+w]
-            # Resize down and up to create pixelation effect
-            small = cv2.resize(roi, (w//self.pixelation_size, h//self.pixelation_size))
-            pixelated = cv2.resize(small, (w, h), interpolation=cv2.INTER_NEAREST)
-            frame[y:y+h, x:x+w] = pixelated
+        replay_only = self.response_store is not None and self.response_store.replay_only
+        if not replay_only and not self.api_guard.available():
+            # Breaker open or over budget: serve local detections without caching them
+            print(f"Gemini unavailable ({self.api_guard.breaker.state}), using OpenCV detection")
+            return self.fallback_opencv_detection(frame), False
         
-        elif blur_type == 'black':
-            frame[y:y+h, x:x+w] = 0
+        # No cache or cache expired, call API
+        print(f"Analyzing frame {self.frame_count} with Gemini...")
+        detections = self.call_gemini_analysis(frame, prompt, on_partial)
         
-        elif blur_type == 'white':
-            frame[y:y+h, x:x+w] = 255
+        # If Gemini returns no detections, use fallback
+        if not detections:
+            print("Gemini returned no detections, using OpenCV fallback...")
+            detections = self.fallback_opencv_detection(frame)
         
-        return frame
+        self.detection_cache.put(cache_key, detections)
+        return detections, True
     
-    def process_frame_with_gemini(self, frame, prompt):
-        """Process frame using Gemini API for intelligent detection"""
-        processed_frame = frame.copy()
+    def analyze_frames(self, frames, prompt):
+        """Batched analyze_frame: cached frames are reused, the rest share multi-image requests"""
+        results = [None] * len(frames)
+        keys = [self.detection_cache.key_for(frame, prompt) for frame in frames]
+        
+        pending = []
+        for idx, key in enumerate(keys):
+            cached_detections = self.detection_cache.get(key)
+            if cached_detections is not None:
+                results[idx] = cached_detections
+            else:
+                pending.append(idx)
+        
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            if not (self.response_store and self.response_store.replay_only) and not self.api_guard.available():
+                print(f"Gemini unavailable ({self.api_guard.breaker.state}), using OpenCV detection for {len(chunk)} frames")
+                for idx in chunk:
+                    results[idx] = self.fallback_opencv_detection(frames[idx])
+                continue
+            print(f"Analyzing {len(chunk)} frames with one Gemini request...")
+            batch_detections = self.call_gemini_batch([frames[idx] for idx in chunk], prompt)
+            
+            # Spread per-index results back to their frames
+            for idx, detections in zip(chunk, batch_detections):
+                if not detections:
+                    detections = self.fallback_opencv_detection(frames[idx])
+                self.detection_cache.put(keys[idx], detections)
+                results[idx] = detections
+        
+        return results
+    
+    def blur_detected_regions(self, processed_frame, blur_regions, verbose=False):
+        """Blur every region on the frame and return per-frame stats"""
         frame_stats = {
             'faces': 0,
             'ids': 0,
@@ -220,63 +695,11 @@ class GeminiVisionBlur:
             'sensitive_content': 0
         }
         
-        # Only analyze every N frames to improve performance
-        should_analyze = (self.frame_count - self.last_analysis_frame) >= self.frame_skip
-        
-        if should_analyze:
-            # Check cache first
-            cache_key = f"{hash(prompt)}_{self.frame_count // 120}"  # Cache every 120 frames (4 seconds)
-            current_time = time.time()
-            
-            if cache_key in self.detection_cache:
-                cache_time, cached_detections = self.detection_cache[cache_key]
-                if current_time - cache_time < self.cache_duration:
-                    print(f"Using cached detection for frame {self.frame_count}")
-                    blur_regions = self.process_detections(cached_detections, frame.shape)
-                else:
-                    # Cache expired, call API
-                    print(f"Analyzing frame {self.frame_count} with Gemini...")
-                    detections = self.call_gemini_analysis(frame, prompt)
-                    
-                    # If Gemini returns no detections, use fallback
-                    if not detections:
-                        print("Gemini returned no detections, using OpenCV fallback...")
-                        detections = self.fallback_opencv_detection(frame)
-                    
-                    self.detection_cache[cache_key] = (current_time, detections)
-                    blur_regions = self.process_detections(detections, frame.shape)
-                    self.last_analysis_frame = self.frame_count
-            else:
-                # No cache, call API
-                print(f"Analyzing frame {self.frame_count} with Gemini...")
-                detections = self.call_gemini_analysis(frame, prompt)
-                
-                # If Gemini returns no detections, use fallback
-                if not detections:
-                    print("Gemini returned no detections, using OpenCV fallback...")
-                    detections = self.fallback_opencv_detection(frame)
-                
-                self.detection_cache[cache_key] = (current_time, detections)
-                blur_regions = self.process_detections(detections, frame.shape)
-                self.last_analysis_frame = self.frame_count
-        else:
-            # Use the most recent cached detections
-            cache_key = f"{hash(prompt)}_{(self.frame_count // 120)}"
-            if cache_key in self.detection_cache:
-                _, cached_detections = self.detection_cache[cache_key]
-                blur_regions = self.process_detections(cached_detections, frame.shape)
-            else:
-                blur_regions = []
-        
-        # Apply blurring to detected regions
         for region in blur_regions:
             bbox = region['bbox']
             detection_type = region['type']
             confidence = region['confidence']
             
-            # Apply blur
-            processed_frame = self.apply_blur(processed_frame, bbox, 'gaussian')
-            
             # Update stats
             if 'face' in detection_type.lower():
                 frame_stats['faces'] += 1
@@ -287,23 +710,225 @@ class GeminiVisionBlur:
             else:
                 frame_stats['sensitive_content'] += 1
             
-            if should_analyze:  # Only print during analysis frames
+            if verbose:  # Only print during analysis frames
                 print(f"Blurred {detection_type} (confidence: {confidence:.2f}) at {bbox}")
         
+        # Overlapping detections are blurred once, as merged boxes
+        blur_boxes = consolidate_boxes([region['bbox'] for region in blur_regions])
+        self.compositor.apply(processed_frame, blur_boxes)
+        self.blur_stats['detections'] += len(blur_regions)
+        self.blur_stats['blurred'] += len(blur_boxes)
+        
         # Update global stats
         for key, value in frame_stats.items():
             self.detection_stats[key] += value
         
+        return frame_stats
+    
+    def update_frame_skip(self):
+        """Record a frame and apply the controller's current analysis interval"""
+        self.skip_controller.record_frame()
+        # One locked snapshot, so the worker can't update the controller between the two reads
+        skip = self.skip_controller.get_stats()
+        self.frame_skip = skip['frame_skip']
+        self.min_redetect_frames = skip['min_frames']
+        self.tracker.max_keyframe_age = 5 * self.frame_skip
+        self.motion_gate.max_idle_frames = min(5 * self.frame_skip, self.max_idle_frames)
+    
+    def redetect_interval(self, reason):
+        """Minimum frames between detections for a given trigger reason"""
+        if reason in ('no_keyframe', 'prompt_changed', 'first_frame'):
+            return 0
+        if reason in ('track_lost', 'robot_motion', 'large_motion', 'new_object'):
+            return self.min_redetect_frames
+        return self.frame_skip
+    
+    def should_redetect(self, frame, prompt):
+        """Decide whether a new detection is due, returns (needed, reason)"""
+        if self.keyframe_prompt is None:
+            return True, 'no_keyframe'
+        if prompt != self.keyframe_prompt:
+            return True, 'prompt_changed'
+        
+        # Cheap motion check: unchanged scenes reuse prior results
+        motion_needed, motion_reason = self.motion_gate.check(frame)
+        needed, reason = False, None
+        if self.tracking_enabled:
+            needed, reason = self.tracker.needs_detection()
+            if reason == 'keyframe_age' and not motion_needed:
+                # Static scene: the old keyframe still describes it
+                needed, reason = False, None
+        if not needed and motion_needed:
+            needed, reason = True, motion_reason
+        if not needed:
+            return False, None
+        
+        # Lost tracks or motion must not turn into an API call per frame
+        if (self.frame_count - self.last_analysis_frame) < self.redetect_interval(reason):
+            return False, reason
+        return True, reason
+    
+    def record_redetect(self, frame, reason):
+        """Count why a detection was requested and remember the scene it describes"""
+        self.redetect_reasons[reason] = self.redetect_reasons.get(reason, 0) + 1
+        if self.roi_enabled:
+            # Capture what moved before the gate forgets the old scene
+            self.roi_motion_regions = self.motion_gate.changed_regions(frame.shape)
+        self.motion_gate.mark_detected(frame)
+        self.last_analysis_frame = self.frame_count
+    
+    def set_keyframe(self, frame, detections, prompt):
+        """Use fresh detections as the new keyframe (and tracking start point)"""
+        self.keyframe_detections = detections
+        self.keyframe_prompt = prompt
+        if self.tracking_enabled:
+            self.tracker.reset(frame, detections)
+    
+    def current_detections(self, frame, prompt):
+        """Detections for this frame: tracked forward from the keyframe, or reused as-is"""
+        if prompt != self.keyframe_prompt:
+            return []
+        if self.tracking_enabled:
+            return self.tracker.update(frame)
+        return self.keyframe_detections
+    
+    def process_frame_with_gemini(self, frame, prompt):
+        """Process frame using Gemini API for intelligent detection (the result is reused by the next call)"""
+        processed_frame = self.compositor.output(frame)
+        self.update_frame_skip()
+        
+        # Motion gate and tracker decide when a new detection is worth paying for
+        should_analyze, reason = self.should_redetect(frame, prompt)
+        
+        if should_analyze:
+            self.record_redetect(frame, reason)
+            # Cache hits come from near-identical frames, so they are valid keyframes too
+            detections, called_api = self.analyze_frame(frame, prompt,
+                                                        use_cache=reason not in self.cache_bypass_reasons)
+            self.set_keyframe(frame, detections, prompt)
+        else:
+            detections = self.current_detections(frame, prompt)
+        blur_regions = self.process_detections(detections, frame.shape)
+        
+        # Apply blurring to detected regions
+        frame_stats = self.blur_detected_regions(processed_frame, blur_regions, verbose=should_analyze)
+        
         return processed_frame, frame_stats
     
+    def start_detection_worker(self):
+        """Start the background Gemini detection worker"""
+        if self.detection_worker is None or not self.detection_worker.is_alive():
+            # Open the API connection while the first frames are still arriving
+            self.http_client.start_warm_up(self.gemini_url)
+            self.detection_worker = DetectionWorker(
+                lambda frame, prompt, on_partial=None, **options: self.analyze_frame(frame, prompt, on_partial,
+                                                                                      **options)[0],
+                name='gemini-detector',
+                partial_results=self.streaming_enabled
+            )
+            self.detection_worker.start()
+        return self.detection_worker
+    
+    def stop_detection_worker(self):
+        """Stop the background Gemini detection worker"""
+        if self.detection_worker:
+            self.detection_worker.stop()
+            self.detection_worker = None
+    
+    def process_frame_async(self, frame, prompt):
+        """Blur frame with the latest worker result; Gemini calls never block the caller"""
+        worker = self.start_detection_worker()
+        self.frame_count += 1
+        processed_frame = self.compositor.output(frame)
+        self.update_frame_skip()
+        
+        # Pick up the newest detections for this prompt
+        result = worker.get_result()
+        new_result = False
+        if result is not None and result['prompt'] == prompt:
+            new_result = result['seq'] != self.last_applied_result
+            self.last_applied_result = result['seq']
+            if new_result:
+                # Key on the frame Gemini actually saw; the tracker then catches up to now
+                self.set_keyframe(result['frame'], result['detections'], prompt)
+        
+        # Hand a new frame to the worker when a refresh is due (the inbox keeps only the newest)
+        should_submit, reason = self.should_redetect(frame, prompt)
+        if should_submit and worker.is_idle():
+            self.record_redetect(frame, reason)
+            worker.submit(frame, prompt, use_cache=reason not in self.cache_bypass_reasons)
+        
+        # Apply the detections to the current frame
+        blur_regions = self.process_detections(self.current_detections(frame, prompt), frame.shape)
+        
+        frame_stats = self.blur_detected_regions(processed_frame, blur_regions, verbose=new_result)
+        
+        return processed_frame, frame_stats
+    
+    def process_video_with_gemini(self, input_path, output_path, prompt=None, keyframe_interval=30):
+        """Re-blur a recorded video, detecting on batched keyframes and tracking in between"""
+        prompt = prompt or self.current_prompt
+        
+        # Pass 1: sample keyframes and detect them in batches (only one batch held in memory)
+        keyframe_detections = {}
+        batch_indices, batch_frames = [], []
+        cap = cv2.VideoCapture(input_path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 20.0
+        frame_idx = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frame_idx % keyframe_interval == 0:
+                batch_indices.append(frame_idx)
+                batch_frames.append(frame)
+                if len(batch_frames) == self.batch_size:
+                    keyframe_detections.update(zip(batch_indices, self.analyze_frames(batch_frames, prompt)))
+                    batch_indices, batch_frames = [], []
+            frame_idx += 1
+        cap.release()
+        if batch_frames:
+            keyframe_detections.update(zip(batch_indices, self.analyze_frames(batch_frames, prompt)))
+        
+        # Pass 2: blur every frame, tracking keyframe boxes forward
+        tracker = BoxTracker(max_keyframe_age=keyframe_interval)
+        cap = cv2.VideoCapture(input_path)
+        out = None
+        frame_idx = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if out is None:
+                height, width = frame.shape[:2]
+                out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+            
+            if frame_idx in keyframe_detections:
+                detections = keyframe_detections[frame_idx]
+                tracker.reset(frame, detections)
+            elif self.tracking_enabled:
+                detections = tracker.update(frame)
+            else:
+                detections = tracker.get_detections()
+            
+            blur_regions = self.process_detections(detections, frame.shape)
+            self.blur_detected_regions(frame, blur_regions)
+            out.write(frame)
+            frame_idx += 1
+        cap.release()
+        if out is not None:
+            out.release()
+        
+        print(f"Saved blurred video: {output_path} ({frame_idx} frames, {len(keyframe_detections)} keyframes)")
+        return output_path
+    
     def fallback_opencv_detection(self, frame):
         """Fallback to OpenCV detection when Gemini fails"""
         detections = []
         
         # Face detection
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+        faces = detect('face', gray, self.detection_width)
         
         for (x, y, w, h) in faces:
             detections.append({
@@ -380,6 +1005,7 @@ class GeminiVisionBlur:
             return
         
         self.is_streaming = True
+        self.http_client.start_warm_up(self.gemini_url)
         
         try:
             while self.is_streaming:
@@ -438,6 +1064,7 @@ class GeminiVisionBlur:
             print(f"Changed prompt to: '{self.current_prompt}'")
             # Clear cache when prompt changes
             self.detection_cache.clear()
+            self.keyframe_prompt = None
     
     def start_recording(self):
         """Start recording video segments"""
@@ -484,9 +1111,50 @@ class GeminiVisionBlur:
         summary = {
             'total_frames': total_frames,
             'detection_stats': self.detection_stats.copy(),
-            'current_prompt': self.current_prompt
+            'current_prompt': self.current_prompt,
+            'frame_skip': self.frame_skip,
+            'min_redetect_frames': self.min_redetect_frames,
+            'cache': self.detection_cache.get_stats(),
+            'skip_controller': self.skip_controller.get_stats()
         }
         
+        if self.detection_worker:
+            summary['detection_worker'] = self.detection_worker.get_stats()
+        if self.tracking_enabled:
+            summary['tracker'] = self.tracker.get_stats()
+        summary['motion_gate'] = self.motion_gate.get_stats()
+        if self.streaming_enabled:
+            stats = self.stream_stats
+            summary['streaming'] = {
+                'requests': stats['requests'],
+                'avg_first_detection_latency': (stats['total_first_detection_latency'] / stats['first_detections']
+                                                if stats['first_detections'] else None),
+                'avg_latency': stats['total_latency'] / stats['requests'] if stats['requests'] else None
+            }
+        summary['redetect_reasons'] = dict(self.redetect_reasons)
+        summary['blur_regions'] = dict(self.blur_stats)
+        summary['compositor'] = self.compositor.get_stats()
+        summary['payload'] = self.payload_encoder.get_stats()
+        summary['http'] = self.http_client.get_stats()
+        summary['api_guard'] = self.api_guard.get_stats()
+        if self.response_store:
+            summary['response_store'] = self.response_store.get_stats()
+        summary['output'] = {
+            'structured': self.structured_output,
+            'max_detections': self.max_detections,
+            'avg_output_tokens': (self.token_stats['output_tokens'] / self.token_stats['responses']
+                                  if self.token_stats['responses'] else None)
+        }
+        if self.roi_enabled:
+            stats = self.roi_stats
+            summary['roi'] = {
+                'mosaic_requests': stats['mosaic_requests'],
+                'full_frame_requests': stats['full_frame_requests'],
+                'avg_regions': stats['regions'] / stats['mosaic_requests'] if stats['mosaic_requests'] else None,
+                'avg_area_fraction': (stats['total_area_fraction'] / stats['mosaic_requests']
+                                      if stats['mosaic_requests'] else None)
+            }
+        
         if total_frames > 0:
             summary['average_detections_per_frame'] = {
                 key: value / total_frames for key, value in self.detection_stats.items()
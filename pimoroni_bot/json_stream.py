@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import json
+
+class IncrementalObjectParser:
+    """Emits JSON objects from a streamed text response as soon as each one closes
+
+    Text is fed in arbitrary chunks. The parser tracks string/escape state
+    and brace depth, and every time a `{...}` closes it tries to decode that
+    slice. Objects accepted by the predicate (e.g. "has a bbox") are
+    returned immediately, so a detection can be blurred before the model
+    has finished writing the rest of the list. Surrounding prose or code
+    fences are ignored. With arrays=True closed `[...]` values are offered
+    to the predicate as well (compact array-per-detection layouts).
+    """
+
+    def __init__(self, predicate=None, arrays=False):
+        self.predicate = predicate or (lambda obj: True)
+        self.arrays = arrays
+        self.buffer = ''
+        self.pos = 0
+        self.in_string = False
+        self.escape = False
+        self.open_objects = []  # start offsets of objects that have not closed yet
+        self.emitted = 0
+
+    def feed(self, text):
+        """Add a chunk of text, returns the objects that closed within it"""
+        self.buffer += text
+        objects = []
+
+        while self.pos < len(self.buffer):
+            ch = self.buffer[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == '{' or ch == '[':
+                self.open_objects.append(self.pos)
+            elif (ch == '}' or ch == ']') and self.open_objects:
+                start = self.open_objects.pop()
+                try:
+                    obj = json.loads(self.buffer[start:self.pos + 1])
+                except ValueError:
+                    obj = None
+                wanted = (dict, list) if self.arrays else dict
+                if isinstance(obj, wanted) and self.predicate(obj):
+                    objects.append(obj)
+                    self.emitted += 1
+            self.pos += 1
+
+        return objects
+
+    @property
+    def text(self):
+        """Everything fed so far"""
+        return self.buffer
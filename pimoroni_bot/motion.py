@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Robot motion reported by the /motor/* endpoints, shared by every gate in the process
+_robot_motion_lock = threading.Lock()
+_robot_motion = {
+    'moving': False,
+    'action': None,
+    'until': 0.0
+}
+
+def notify_robot_motion(action, settle_time=1.0):
+    """Record a motor command so motion gates force a refresh while the robot moves"""
+    with _robot_motion_lock:
+        _robot_motion['action'] = action
+        _robot_motion['moving'] = action != 'stop'
+        # The camera keeps moving for a moment after the motors stop
+        _robot_motion['until'] = time.time() + settle_time
+
+def robot_is_moving():
+    """True while the robot drives or is still settling after a stop"""
+    with _robot_motion_lock:
+        return _robot_motion['moving'] or time.time() < _robot_motion['until']
+
+class MotionGate:
+    """Cheap downscaled frame-difference motion estimator that gates detection
+
+    Frames are shrunk to a small blurred thumbnail and compared against the
+    previous frame (large sudden motion) and against the thumbnail taken at
+    the last detection (accumulated scene change). Unchanged scenes reuse
+    prior results; large motion, robot motion, any changed blob as big as
+    the smallest detectable subject (a face too small to move the changed
+    fraction) or a long idle period force a refresh. Trigger reasons are
+    counted and logged for threshold tuning.
+    """
+
+    def __init__(self, name='motion', size=(80, 60), pixel_threshold=25, change_fraction=0.02,
+                 large_motion_fraction=0.25, min_object_size=24, max_idle_frames=900, verbose=False):
+        self.name = name
+        self.size = size
+        self.pixel_threshold = pixel_threshold  # gray-level delta that counts as a changed pixel
+        self.change_fraction = change_fraction  # changed fraction vs. last detection that triggers a refresh
+        self.large_motion_fraction = large_motion_fraction  # frame-to-frame fraction that triggers at once
+        self.min_object_size = min_object_size  # frame pixels; a changed blob this wide and high triggers
+        self.max_idle_frames = max_idle_frames  # refresh static scenes eventually anyway
+        self.verbose = verbose
+
+        self.prev_thumb = None
+        self.keyframe_thumb = None
+        self.frames_since_detection = 0
+        self.last_change = 0.0
+        self.last_motion = 0.0
+        self.last_logged_reason = None
+        self.trigger_counts = {}
+        self.skipped = 0
+
+    def _thumbnail(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(thumb, (5, 5), 0)
+
+    def _changed_fraction(self, a, b):
+        return float(np.count_nonzero(cv2.absdiff(a, b) > self.pixel_threshold)) / a.size
+
+    def _changed_blobs(self, a, b, dilate=False):
+        """(x, y, w, h, area) in thumbnail pixels of each connected region that differs between a and b"""
+        mask = (cv2.absdiff(a, b) > self.pixel_threshold).astype(np.uint8)
+        if dilate:
+            mask = cv2.dilate(mask, np.ones((3, 3), np.uint8))
+        _, _, blobs, _ = cv2.connectedComponentsWithStats(mask)
+        return blobs[1:]
+
+    def _object_appeared(self, thumb, frame_shape):
+        """True when some changed blob is at least min_object_size across in both directions"""
+        if self.last_change == 0.0:
+            return False
+        min_w = self.min_object_size * self.size[0] / float(frame_shape[1])
+        min_h = self.min_object_size * self.size[1] / float(frame_shape[0])
+        return any(w >= min_w and h >= min_h for _, _, w, h, _ in self._changed_blobs(thumb, self.keyframe_thumb))
+
+    def check(self, frame):
+        """Measure motion on this frame, returns (should_detect, reason)"""
+        thumb = self._thumbnail(frame)
+        self.frames_since_detection += 1
+
+        self.last_motion = self._changed_fraction(thumb, self.prev_thumb) if self.prev_thumb is not None else 0.0
+        self.last_change = self._changed_fraction(thumb, self.keyframe_thumb) if self.keyframe_thumb is not None else 0.0
+        self.prev_thumb = thumb
+
+        if self.keyframe_thumb is None:
+            reason = 'first_frame'
+        elif robot_is_moving():
+            reason = 'robot_motion'
+        elif self.last_motion >= self.large_motion_fraction:
+            reason = 'large_motion'
+        elif self.last_change >= self.change_fraction:
+            reason = 'scene_changed'
+        elif self._object_appeared(thumb, frame.shape):
+            reason = 'new_object'
+        elif self.frames_since_detection >= self.max_idle_frames:
+            reason = 'max_idle'
+        else:
+            self.skipped += 1
+            self.last_logged_reason = None
+            return False, None
+
+        self.trigger_counts[reason] = self.trigger_counts.get(reason, 0) + 1
+        if self.verbose or reason != self.last_logged_reason:
+            print(f"Motion gate [{self.name}]: detect ({reason}, motion={self.last_motion:.3f}, change={self.last_change:.3f})")
+            self.last_logged_reason = reason
+        return True, reason
+
+    def changed_regions(self, frame_shape, min_pixels=4):
+        """Boxes (in frame pixels) around what changed since the last detection"""
+        if self.prev_thumb is None or self.keyframe_thumb is None:
+            return []
+        blobs = self._changed_blobs(self.prev_thumb, self.keyframe_thumb, dilate=True)
+
+        sx = frame_shape[1] / float(self.size[0])
+        sy = frame_shape[0] / float(self.size[1])
+        regions = []
+        for x, y, w, h, area in blobs:
+            if area >= min_pixels:
+                regions.append((int(x * sx), int(y * sy), int(np.ceil(w * sx)), int(np.ceil(h * sy))))
+        return regions
+
+    def mark_detected(self, frame=None):
+        """Remember the scene that the current detections describe"""
+        self.keyframe_thumb = self._thumbnail(frame) if frame is not None else self.prev_thumb
+        self.frames_since_detection = 0
+
+    def reset(self):
+        """Forget the keyframe so the next check always triggers"""
+        self.keyframe_thumb = None
+
+    def get_stats(self):
+        """Get trigger counts and latest motion measurements"""
+        return {
+            'triggers': dict(self.trigger_counts),
+            'skipped': self.skipped,
+            'last_motion': round(self.last_motion, 4),
+            'last_change': round(self.last_change, 4),
+            'frames_since_detection': self.frames_since_detection
+        }
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+import base64
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+class PayloadEncoder:
+    """Picks upload resolution, quality and format for each Gemini request
+
+    Requests climb a ladder of (max width, quality) levels. The base level
+    is the largest one whose measured payload uploads within the time budget
+    at the estimated bandwidth, minus one step while Gemini itself is slow.
+    Request time is mostly model inference, so bandwidth is not bytes over
+    request time: it is the slope of a least-squares fit of request time
+    against payload size over recent requests, which leaves the size-
+    independent part (round trip plus inference) in the intercept. Until
+    the payload sizes spread enough for a fit, one request is sent a level
+    up as a probe.
+    After an empty or low-confidence result the next requests escalate one
+    level at a time; a confident result drops back to the base level. The
+    format (JPEG or WebP) with the lower estimated encode + upload time wins.
+    The detection worker encodes and records results while the render
+    thread reads stats, so the estimates are guarded by one lock.
+    """
+
+    def __init__(self, levels=None, default_level=1, upload_budget=0.5, latency_budget=3.0,
+                 low_confidence=0.5, max_escalation=2, smoothing=0.3, history=100, fit_samples=20,
+                 min_size_spread=0.25):
+        # (max width, quality); default_level matches the old fixed 480 px / q70 payload
+        self.levels = levels or [(320, 50), (480, 70), (640, 80), (960, 90)]
+        self.default_level = default_level
+        self.upload_budget = upload_budget  # seconds an upload may take
+        self.latency_budget = latency_budget  # step down while Gemini is slower than this
+        self.low_confidence = low_confidence
+        self.max_escalation = max_escalation  # an empty room should not pin uploads at the top level
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+
+        ok, _ = cv2.imencode('.webp', np.zeros((8, 8, 3), dtype=np.uint8), [cv2.IMWRITE_WEBP_QUALITY, 50])
+        self.formats = ['jpeg', 'webp'] if ok else ['jpeg']
+
+        # Smoothed measurements
+        self.bandwidth = None  # bytes/s from the request-time fit, inf when size doesn't affect time
+        self.server_time = None  # seconds of request time that don't depend on payload size
+        self.latency = None
+        self.samples = deque(maxlen=fit_samples)  # (upload bytes, request seconds)
+        self.min_size_spread = min_size_spread  # coefficient of variation of sizes needed for a fit
+        self.probe_pending = False
+        self.since_probe = 0
+        self.bytes_per_pixel = {}  # (format, level) -> bytes per uploaded pixel
+        self.encode_per_pixel = {}  # format -> seconds per uploaded pixel
+        self.escalation = 0
+        self.level = default_level
+        self.adaptive = True  # False: always default_level JPEG, so identical frames give identical bytes
+
+        self.requests = deque(maxlen=history)
+        self.total_bytes = 0
+        self.total_encode_time = 0.0
+        self.encodes = 0
+
+    def _ewma(self, current, sample):
+        if current is None:
+            return sample
+        return (1 - self.smoothing) * current + self.smoothing * sample
+
+    def _fit_bandwidth(self):
+        """Fit request time = server_time + bytes / bandwidth over the recent samples"""
+        if len(self.samples) < 3:
+            return
+        sizes = np.array([size for size, _ in self.samples], dtype=np.float64)
+        times = np.array([seconds for _, seconds in self.samples], dtype=np.float64)
+        if sizes.std() < self.min_size_spread * sizes.mean():
+            # Same-sized payloads can't separate upload from inference: probe another level,
+            # at most once per half window so the estimate stays fresh without constant probing
+            if self.bandwidth is None or self.since_probe >= self.samples.maxlen // 2:
+                self.probe_pending = True
+            return
+        slope = np.cov(sizes, times, bias=True)[0, 1] / sizes.var()
+        self.bandwidth = 1.0 / slope if slope > 0 else float('inf')
+        self.server_time = max(0.0, times.mean() - slope * sizes.mean()) if slope > 0 else times.min()
+
+    def _base_level(self):
+        if self.bandwidth is None:
+            return self.default_level
+        level = 0
+        for idx, (width, _) in enumerate(self.levels):
+            pixels = width * width * 9 / 16.0  # assume 16:9 until measured
+            bpp = min(self.bytes_per_pixel.get((fmt, idx), 0.5) for fmt in self.formats)
+            if pixels * bpp / self.bandwidth <= self.upload_budget:
+                level = idx
+        if self.latency is not None and self.latency > self.latency_budget:
+            level -= 1
+        return max(level, 0)
+
+    def _pick_format(self, pixels):
+        if len(self.formats) == 1 or self.bandwidth is None:
+            return 'jpeg'
+        best, best_cost = 'jpeg', None
+        for fmt in self.formats:
+            if fmt not in self.encode_per_pixel:
+                return fmt  # measure each format once
+            bpp = self.bytes_per_pixel.get((fmt, self.level), 0.5)
+            cost = pixels * self.encode_per_pixel[fmt] + pixels * bpp / self.bandwidth
+            if best_cost is None or cost < best_cost:
+                best, best_cost = fmt, cost
+        return best
+
+    def encode(self, frame):
+        """Encode a frame at the current level, returns a dict with mime_type, data, width and stats"""
+        with self._lock:
+            if self.adaptive:
+                self.level = min(self._base_level() + self.escalation, len(self.levels) - 1)
+                self.since_probe += 1
+                if self.probe_pending:
+                    self.probe_pending = False
+                    self.since_probe = 0
+                    self.level = self.level + 1 if self.level < len(self.levels) - 1 else self.level - 1
+            else:
+                self.level = self.default_level
+            max_width, quality = self.levels[self.level]
+
+            start_time = time.time()
+            height, width = frame.shape[:2]
+            if width > max_width:
+                scale = max_width / width
+                frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+            height, width = frame.shape[:2]
+            pixels = width * height
+
+            fmt = self._pick_format(pixels) if self.adaptive else 'jpeg'
+            if fmt == 'webp':
+                _, buffer = cv2.imencode('.webp', frame, [cv2.IMWRITE_WEBP_QUALITY, quality])
+            else:
+                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            encode_time = time.time() - start_time
+
+            size = len(buffer)
+            self.bytes_per_pixel[(fmt, self.level)] = self._ewma(self.bytes_per_pixel.get((fmt, self.level)), size / float(pixels))
+            self.encode_per_pixel[fmt] = self._ewma(self.encode_per_pixel.get(fmt), encode_time / float(pixels))
+            self.total_bytes += size
+            self.total_encode_time += encode_time
+            self.encodes += 1
+
+            record = {
+                'format': fmt,
+                'level': self.level,
+                'width': width,
+                'height': height,
+                'quality': quality,
+                'bytes': size,
+                'encode_ms': round(encode_time * 1000, 2)
+            }
+            self.requests.append(record)
+
+        result = dict(record)
+        result['mime_type'] = 'image/webp' if fmt == 'webp' else 'image/jpeg'
+        result['data'] = base64.b64encode(buffer).decode('utf-8')
+        return result
+
+    def record_request(self, upload_bytes, latency, ok=True):
+        """Record a finished request to update the bandwidth and latency estimates"""
+        if not ok or latency <= 0:
+            return
+        with self._lock:
+            self.latency = self._ewma(self.latency, latency)
+            self.samples.append((upload_bytes, latency))
+            self._fit_bandwidth()
+
+    def record_detections(self, detections):
+        """Escalate quality after empty or low-confidence results, relax after confident ones"""
+        with self._lock:
+            confidence = max([d.get('confidence', 0.0) for d in detections] or [0.0])
+            if confidence < self.low_confidence:
+                self.escalation = min(self.escalation + 1, self.max_escalation)
+            else:
+                self.escalation = 0
+
+    def get_stats(self):
+        """Get the current choice plus per-request byte counts and encode times"""
+        with self._lock:
+            return {
+                'level': self.level,
+                'max_width': self.levels[self.level][0],
+                'quality': self.levels[self.level][1],
+                'escalation': self.escalation,
+                'formats': list(self.formats),
+                'bandwidth_kbps': round(self.bandwidth * 8 / 1000, 1) if self.bandwidth not in (None, float('inf')) else None,
+                'upload_limited': self.bandwidth not in (None, float('inf')),
+                'server_time': round(self.server_time, 3) if self.server_time is not None else None,
+                'latency': round(self.latency, 3) if self.latency is not None else None,
+                'encodes': self.encodes,
+                'avg_bytes': self.total_bytes / self.encodes if self.encodes else None,
+                'avg_encode_ms': self.total_encode_time * 1000 / self.encodes if self.encodes else None,
+                'recent': list(self.requests)[-10:]
+            }
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Classic token bucket: `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate=1.0, capacity=3):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.time()
+        self.blocked_until = 0.0  # set from Retry-After
+        self.granted = 0
+        self.throttled = 0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, now):
+        self._refill(now)
+        return now >= self.blocked_until and self.tokens >= 1.0
+
+    def acquire(self, now):
+        if not self.available(now):
+            self.throttled += 1
+            return False
+        self.tokens -= 1.0
+        self.granted += 1
+        return True
+
+    def block(self, seconds, now):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single probe through after a cool-down
+
+    Each failed probe doubles the cool-down (up to max_reset_timeout). A
+    Retry-After from the server overrides the cool-down when it is longer.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=15.0, max_reset_timeout=300.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self.state = 'closed'
+        self.failures = 0
+        self.current_timeout = reset_timeout
+        self.opened_at = None
+        self.open_until = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allows(self, now):
+        if self.state == 'open' and now >= self.open_until:
+            self.state = 'half_open'
+            self.probe_in_flight = False
+        if self.state == 'open' or (self.state == 'half_open' and self.probe_in_flight):
+            return False
+        return True
+
+    def on_request(self):
+        if self.state == 'half_open':
+            self.probe_in_flight = True
+
+    def on_success(self):
+        if self.state != 'closed':
+            print("Circuit breaker closed")
+        self.state = 'closed'
+        self.failures = 0
+        self.current_timeout = self.reset_timeout
+        self.probe_in_flight = False
+
+    def on_failure(self, now, retry_after=None):
+        self.failures += 1
+        if self.state == 'half_open':
+            # Probe failed: back off harder
+            self.current_timeout = min(self.current_timeout * 2, self.max_reset_timeout)
+        elif self.failures < self.failure_threshold:
+            if retry_after is not None:
+                self.open(now, retry_after)  # server told us exactly how long
+            return
+        self.open(now, max(self.current_timeout, retry_after or 0.0))
+
+    def open(self, now, seconds):
+        if self.state != 'open':
+            self.times_opened += 1
+            self.opened_at = now
+        self.state = 'open'
+        self.open_until = max(self.open_until, now + seconds)
+        self.probe_in_flight = False
+        print(f"Circuit breaker open for {self.open_until - now:.0f}s after {self.failures} failures")
+
+class ApiGuard:
+    """Process-wide request budget for one API: token bucket in front of a circuit breaker
+
+    Every caller asks acquire() before sending and reports the outcome with
+    record_result(). 429 and 5xx responses and transport errors count as
+    failures; a Retry-After header pauses the bucket and holds the breaker
+    open for at least that long. While requests are refused callers serve
+    local detections instead.
+    """
+
+    def __init__(self, name, rate=1.0, capacity=3, failure_threshold=3, reset_timeout=15.0):
+        self.name = name
+        self.bucket = TokenBucket(rate, capacity)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._lock = threading.Lock()
+        self.last_status = None
+        self.last_error = None
+
+    def available(self):
+        """Would a request be allowed right now (without using a token)"""
+        now = time.time()
+        with self._lock:
+            return self.breaker.allows(now) and self.bucket.available(now)
+
+    def acquire(self):
+        """Take a token for one request, returns (allowed, reason)"""
+        now = time.time()
+        with self._lock:
+            if not self.breaker.allows(now):
+                self.breaker.rejected += 1
+                return False, 'circuit_open'
+            if not self.bucket.acquire(now):
+                return False, 'rate_limited'
+            self.breaker.on_request()
+            return True, None
+
+    def record_result(self, status_code=None, retry_after=None, error=None):
+        """Report how a request ended (status_code None means it never got a response)"""
+        now = time.time()
+        wait = parse_retry_after(retry_after)
+        with self._lock:
+            self.last_status = status_code
+            failed = status_code is None or status_code == 429 or status_code >= 500
+            if not failed:
+                self.breaker.on_success()
+                return
+            self.last_error = error or f"HTTP {status_code}"
+            if wait is not None:
+                self.bucket.block(wait, now)
+            self.breaker.on_failure(now, wait)
+
+    def get_stats(self):
+        """Get breaker state and limiter counters"""
+        now = time.time()
+        with self._lock:
+            self.breaker.allows(now)  # advance open -> half_open if due
+            self.bucket._refill(now)
+            return {
+                'name': self.name,
+                'state': self.breaker.state,
+                'consecutive_failures': self.breaker.failures,
+                'open_for': round(max(0.0, self.breaker.open_until - now), 1) if self.breaker.state == 'open' else 0.0,
+                'times_opened': self.breaker.times_opened,
+                'rejected_open': self.breaker.rejected,
+                'rate': self.bucket.rate,
+                'tokens': round(self.bucket.tokens, 2),
+                'granted': self.bucket.granted,
+                'throttled': self.bucket.throttled,
+                'retry_after_remaining': round(max(0.0, self.bucket.blocked_until - now), 1),
+                'last_status': self.last_status,
+                'last_error': self.last_error
+            }
+
+# One guard per API, shared by every GeminiVisionBlur in the process
+_guards = {}
+_guards_lock = threading.Lock()
+
+def get_api_guard(name='gemini', **kwargs):
+    """Return the process-wide guard for an API, creating it on first use"""
+    with _guards_lock:
+        if name not in _guards:
+            _guards[name] = ApiGuard(name, **kwargs)
+        return _guards[name]
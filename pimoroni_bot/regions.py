@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+def _corners(boxes):
+    """(x, y, w, h) boxes as an N x 4 float array of (x1, y1, x2, y2)"""
+    array = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    return np.column_stack((array[:, 0], array[:, 1], array[:, 0] + array[:, 2], array[:, 1] + array[:, 3]))
+
+def _pairwise(corners):
+    """Intersection areas and individual areas for every pair of boxes"""
+    x1 = np.maximum(corners[:, None, 0], corners[None, :, 0])
+    y1 = np.maximum(corners[:, None, 1], corners[None, :, 1])
+    x2 = np.minimum(corners[:, None, 2], corners[None, :, 2])
+    y2 = np.minimum(corners[:, None, 3], corners[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    areas = (corners[:, 2] - corners[:, 0]) * (corners[:, 3] - corners[:, 1])
+    return intersection, areas
+
+def is_covered(box, others):
+    """True when an (x, y, w, h) box lies entirely inside one of the other boxes"""
+    x, y, w, h = box
+    return any(ox <= x and oy <= y and x + w <= ox + ow and y + h <= oy + oh for ox, oy, ow, oh in others)
+
+def suppress(boxes, containment=1.0):
+    """Non-maximum suppression for blurring: largest boxes win and a box is dropped when at
+    least `containment` of it lies inside a kept box (the default never loses coverage)"""
+    corners = _corners(boxes)
+    if len(corners) < 2:
+        return corners
+    intersection, areas = _pairwise(corners)
+    inside = np.divide(intersection, areas[:, None], out=np.ones_like(intersection), where=areas[:, None] > 0)
+    covers = inside >= containment  # covers[i, j]: box i is redundant given j
+
+    keep = np.ones(len(corners), dtype=bool)
+    for i in np.argsort(-areas, kind='stable'):
+        if not keep[i]:
+            continue
+        # Everything smaller that i makes redundant goes
+        redundant = covers[:, i] & (areas <= areas[i])
+        redundant[i] = False
+        keep &= ~redundant
+    return corners[keep]
+
+def merge_overlapping(corners, iou_threshold=0.5, max_growth=0.25):
+    """Replace overlapping boxes by their bounding union when their IoU exceeds iou_threshold
+    or the union adds at most max_growth more pixels than the boxes already cover, repeated
+    until nothing merges"""
+    while len(corners) > 1:
+        intersection, areas = _pairwise(corners)
+        covered = areas[:, None] + areas[None, :] - intersection
+        iou = np.divide(intersection, covered, out=np.zeros_like(intersection), where=covered > 0)
+        union_w = np.maximum(corners[:, None, 2], corners[None, :, 2]) - np.minimum(corners[:, None, 0], corners[None, :, 0])
+        union_h = np.maximum(corners[:, None, 3], corners[None, :, 3]) - np.minimum(corners[:, None, 1], corners[None, :, 1])
+        mergeable = (intersection > 0) & ((iou > iou_threshold) | (union_w * union_h <= covered * (1.0 + max_growth)))
+        np.fill_diagonal(mergeable, False)
+        if not mergeable.any():
+            break
+
+        # Group connected boxes (union-find over the mergeable pairs)
+        parent = list(range(len(corners)))
+
+        def root(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        for i, j in zip(*np.nonzero(np.triu(mergeable))):
+            parent[root(i)] = root(j)
+
+        labels = np.array([root(i) for i in range(len(corners))])
+        groups = np.unique(labels)
+        merged = np.empty((len(groups), 4))
+        for idx, label in enumerate(groups):
+            members = corners[labels == label]
+            merged[idx] = (members[:, 0].min(), members[:, 1].min(), members[:, 2].max(), members[:, 3].max())
+        corners = merged
+    return corners
+
+def consolidate_boxes(boxes, iou_threshold=0.5, containment=1.0, max_growth=0.25):
+    """Reduce detections to the set of boxes worth blurring: NMS, then union of heavily
+    overlapping boxes. Returns (x, y, w, h) integer tuples, largest first."""
+    corners = merge_overlapping(suppress(boxes, containment), iou_threshold, max_growth)
+    corners = corners[np.argsort(-(corners[:, 2] - corners[:, 0]) * (corners[:, 3] - corners[:, 1]), kind='stable')]
+    return [(int(x1), int(y1), int(x2 - x1), int(y2 - y1)) for x1, y1, x2, y2 in corners]
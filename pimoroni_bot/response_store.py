@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class ReplayMiss(Exception):
+    """Raised in replay-only mode when a request is not in the store"""
+
+def request_key(payload, model):
+    """Stable hash of a request: encoded image bytes, prompt text, generation config and model"""
+    digest = hashlib.sha256(model.encode('utf-8'))
+    digest.update(json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    return digest.hexdigest()
+
+class ResponseStore:
+    """Size-bounded SQLite store of Gemini results, evicting least recently used entries
+
+    Re-processing the same recording sends byte-identical requests, so they
+    are answered from disk instead of being billed and waited on again. In
+    replay_only mode a miss raises ReplayMiss instead of reaching the API,
+    which keeps offline benchmarks deterministic.
+    """
+
+    def __init__(self, path, max_bytes=100 * 1024 * 1024, replay_only=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.replay_only = replay_only
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS responses (
+                               key TEXT PRIMARY KEY,
+                               value TEXT NOT NULL,
+                               size INTEGER NOT NULL,
+                               created REAL NOT NULL,
+                               last_used REAL NOT NULL)''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)')
+        self.db.commit()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the stored value for a key, or None (ReplayMiss in replay-only mode)"""
+        with self._lock:
+            row = self.db.execute('SELECT value FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.db.execute('UPDATE responses SET last_used = ? WHERE key = ?', (time.time(), key))
+                self.db.commit()
+        if row is None:
+            if self.replay_only:
+                raise ReplayMiss(f"No stored Gemini response for request {key[:12]}")
+            return None
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        """Store a JSON-serializable value, then evict LRU entries beyond max_bytes"""
+        if self.replay_only:
+            return
+        text = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self.db.execute('INSERT OR REPLACE INTO responses (key, value, size, created, last_used) '
+                            'VALUES (?, ?, ?, ?, ?)', (key, text, len(text), now, now))
+            self.writes += 1
+            total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            if total > self.max_bytes:
+                for old_key, size in self.db.execute('SELECT key, size FROM responses ORDER BY last_used').fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self.db.execute('DELETE FROM responses WHERE key = ?', (old_key,))
+                    total -= size
+                    self.evictions += 1
+            self.db.commit()
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+    def get_stats(self):
+        """Get entry count, size on disk and hit/miss counters"""
+        with self._lock:
+            entries, size = self.db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'path': self.path,
+                'replay_only': self.replay_only,
+                'entries': entries,
+                'bytes': size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
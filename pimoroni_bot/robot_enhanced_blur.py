@@ -1,25 +1,46 @@
 #!/usr/bin/env python3
 
 import cv2
-import numpy as np
 import os
 import time
 import threading
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 
+from pimoroni_bot.motion import MotionGate
+from pimoroni_bot.detectors import detect, get_registry, DEFAULT_DETECTION_WIDTH
+from pimoroni_bot.frame_features import FrameFeatures
+from pimoroni_bot.regions import consolidate_boxes, is_covered
+from pimoroni_bot.compositor import BlurCompositor
+from pimoroni_bot.color_segmentation import ColorSegmenter
+
 # Load environment variables
 load_dotenv()
 
+# Schedule per detector: stat key, cadence (run every Nth detection pass, reusing the
+# last boxes in between), time budget in ms on a Pi 4 (also the cost estimate until
+# measured) and detection width (None: detection_width for cascades, full frame otherwise).
+# Cascades never go below the width their DETECTION_PROFILES size floor needs, so with
+# the default FACE_MIN_SIZE faces run at full resolution on a 640x480 stream. covered_by
+# names detectors whose boxes make this one's redundant (a face inside a detected body).
+DETECTORS = {
+    'faces': {'stat_key': 'faces', 'every': 1, 'budget_ms': 15.0, 'width': None, 'covered_by': ('bodies',)},
+    'eyes': {'stat_key': 'eyes', 'every': 1, 'budget_ms': 20.0, 'width': None, 'covered_by': ('faces', 'bodies')},
+    'bodies': {'stat_key': 'bodies', 'every': 3, 'budget_ms': 40.0, 'width': 240, 'covered_by': ()},
+    'color': {'stat_key': 'color_regions', 'every': 1, 'budget_ms': 5.0, 'width': None, 'covered_by': ()},
+    'text': {'stat_key': 'text_regions', 'every': 3, 'budget_ms': 10.0, 'width': None, 'covered_by': ()},
+    'license_plates': {'stat_key': 'license_plates', 'every': 5, 'budget_ms': 10.0, 'width': None, 'covered_by': ()}
+}
+
 class RobotEnhancedBlur:
     """Enhanced robot video stream with OpenCV prompt-based blurring"""
     
     def __init__(self):
-        # Load detection models
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
-        self.body_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_fullbody.xml')
+        # Load detection models (shared registry, one instance per thread)
+        get_registry().preload(['face', 'eye', 'body'])
+        self.detection_width = DEFAULT_DETECTION_WIDTH  # Haar resolution, separate from the stream
         
         # Color detection ranges
         self.color_ranges = {
@@ -31,9 +52,13 @@ class RobotEnhancedBlur:
             'black': [([0, 0, 0], [180, 255, 30])]
         }
         
+        self.color_segmenter = ColorSegmenter(self.color_ranges)
+        self.color_pixel_counts = {}  # pixels labelled per colour, over all frames
+        
         # Blur settings
         self.blur_strength = 51
         self.pixelation_size = 20
+        self.compositor = BlurCompositor('gaussian', self.blur_strength, self.pixelation_size)
         
         # Current prompt and settings
         self.current_prompt = "blur faces and license plates"
@@ -53,6 +78,38 @@ class RobotEnhancedBlur:
         self.recorded_frames = []
         self.recording_duration = 30  # seconds
         
+        # Motion gate for the local detectors. They ran on every frame before the gate existed, so the
+        # idle refresh stays at one frame; the cadence/budget scheduler is what saves detector time.
+        self.motion_gate = MotionGate('local', max_idle_frames=1)
+        self.last_detection = None
+        
+        # Detections found vs boxes actually blurred after consolidation
+        self.blur_stats = {'detections': 0, 'blurred': 0}
+        
+        # Per-frame shared feature cost (gray, hsv, edges, downscaled gray)
+        self.feature_stats = {}
+        
+        # Compiled detection plans by prompt, with measured per-detector cost and last boxes
+        self.plan_cache = {}
+        self.detector_costs = {}
+        self.step_boxes = {}
+        self.step_last_run = {}
+        self.detection_round = 0
+        
+        # Total detection time allowed per frame, so the stream holds its target rate
+        self.target_fps = 30
+        self.detection_budget_ms = 0.6 * 1000 / self.target_fps
+        self.scheduler_stats = {}
+        self.frames_over_budget = 0
+        
+        # Optional parallel detection (DETECTION_WORKERS > 1), wall vs summed detector time
+        self.detection_pool = None
+        self.detection_workers = 1
+        self.parallel_stats = {'frames': 0, 'wall_ms': 0.0, 'serial_ms': 0.0}
+        workers = int(os.getenv('DETECTION_WORKERS', '0'))
+        if workers > 1:
+            self.enable_parallel(workers)
+        
     def parse_prompt(self, prompt):
         """Parse custom prompt to determine what to detect"""
         prompt_lower = prompt.lower()
@@ -89,46 +146,43 @@ class RobotEnhancedBlur:
         
         return detection_types
     
-    def detect_faces(self, frame):
+    def detect_faces(self, frame, features=None, width=None):
         """Detect faces in frame"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+        features = features or FrameFeatures(frame)
+        faces = detect('face', features.gray, width or self.detection_width, resize=features.gray_at)
         return faces
     
-    def detect_eyes(self, frame):
+    def detect_eyes(self, frame, features=None, width=None):
         """Detect eyes in frame"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        eyes = self.eye_cascade.detectMultiScale(gray, 1.3, 5)
+        features = features or FrameFeatures(frame)
+        eyes = detect('eye', features.gray, width or self.detection_width, resize=features.gray_at)
         return eyes
     
-    def detect_bodies(self, frame):
+    def detect_bodies(self, frame, features=None, width=None):
         """Detect full bodies in frame"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        bodies = self.body_cascade.detectMultiScale(gray, 1.3, 5)
+        features = features or FrameFeatures(frame)
+        bodies = detect('body', features.gray, width or self.detection_width, resize=features.gray_at)
         return bodies
     
-    def detect_colors(self, frame, color_name):
+    def detect_color_regions(self, frame, colors, features=None):
+        """Detect several colors in one segmentation pass, returns {color: contours}"""
+        features = features or FrameFeatures(frame)
+        colors = tuple(colors)
+        labels, counts = self.color_segmenter.segment(features.hsv, colors)
+        for color, count in counts.items():
+            self.color_pixel_counts[color] = self.color_pixel_counts.get(color, 0) + count
+        return self.color_segmenter.contours(labels, colors, counts)
+    
+    def detect_colors(self, frame, color_name, features=None):
         """Detect specific colors in frame"""
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        color_ranges = self.color_ranges.get(color_name, [])
-        
-        masks = []
-        for lower, upper in color_ranges:
-            mask = cv2.inRange(hsv, np.array(lower), np.array(upper))
-            masks.append(mask)
-        
-        if masks:
-            combined_mask = sum(masks)
-            contours, _ = cv2.findContours(combined_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            return contours
-        return []
+        return self.detect_color_regions(frame, [color_name], features)[color_name]
     
-    def detect_text_regions(self, frame):
+    def detect_text_regions(self, frame, features=None):
         """Detect potential text regions using edge detection"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        features = features or FrameFeatures(frame)
         
-        # Edge detection
-        edges = cv2.Canny(gray, 50, 150)
+        # Edge detection (shared with license plates)
+        edges = features.edges
         
         # Morphological operations to connect text lines
         kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (20, 5))
@@ -146,12 +200,12 @@ class RobotEnhancedBlur:
         
         return text_contours
     
-    def detect_license_plates(self, frame):
+    def detect_license_plates(self, frame, features=None):
         """Detect potential license plates"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        features = features or FrameFeatures(frame)
         
-        # Edge detection
-        edges = cv2.Canny(gray, 50, 150)
+        # Edge detection (shared with text regions)
+        edges = features.edges
         
         # Look for rectangular shapes (license plate candidates)
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -169,32 +223,213 @@ class RobotEnhancedBlur:
     
     def apply_blur(self, frame, region, blur_type='gaussian'):
         """Apply blur to a specific region"""
-        x, y, w, h = region
-        
-        if blur_type == 'gaussian':
-            roi = frame[y:y+h, x:x+w]
-            blurred_roi = cv2.GaussianBlur(roi, (self.blur_strength, self.blur_strength), 0)
-            frame[y:y+h, x:x+w] = blurred_roi
-        
-        elif blur_type == 'pixelate':
-            roi = frame[y:y+h, x:x+w]
-            # Resize down and up to create pixelation effect
-            small = cv2.resize(roi, (w//self.pixelation_size, h//self.pixelation_size))
-            pixelated = cv2.resize(small, (w, h), interpolation=cv2.INTER_NEAREST)
-            frame[y:y+h, x:x+w] = pixelated
-        
-        elif blur_type == 'black':
-            frame[y:y+h, x:x+w] = 0
-        
-        elif blur_type == 'white':
-            frame[y:y+h, x:x+w] = 255
+        return self.compositor.apply(frame, [region], blur_type)
+    
+    def compile_prompt(self, prompt):
+        """Turn a prompt into a deduplicated detection plan (cached per prompt)
+        
+        Steps stay in prompt order, which is also the order their boxes are
+        merged in; costs change as detectors are measured, so detect_regions
+        and describe_plan order steps by cost when they are used.
+        """
+        if prompt in self.plan_cache:
+            return self.plan_cache[prompt]
+        
+        detection_types = list(dict.fromkeys(self.parse_prompt(prompt)))
+        blur_whole_frame = 'sensitive' in detection_types
+        
+        # All requested colours share one segmentation pass
+        colors = tuple(t.replace('color_', '') for t in detection_types if t.startswith('color_'))
+        if colors:
+            first = next(i for i, t in enumerate(detection_types) if t.startswith('color_'))
+            detection_types = [t for t in detection_types if not t.startswith('color_')]
+            detection_types.insert(first, 'colors')
+        
+        steps = []
+        if not blur_whole_frame:  # the whole frame gets blurred anyway, so skip the detectors
+            for detection_type in detection_types:
+                name = 'color' if detection_type == 'colors' else detection_type
+                defaults = DETECTORS[name]
+                steps.append({
+                    'name': detection_type,
+                    'detector': name,
+                    'stat_key': defaults['stat_key'],
+                    'every': defaults['every'],
+                    'budget_ms': defaults['budget_ms'],
+                    'width': defaults['width']
+                })
+                if name == 'color':
+                    steps[-1]['colors'] = colors
+        
+        # e.g. 'person' asks for faces and bodies: faces inside a body box are not blurred twice
+        names = [step['name'] for step in steps]
+        for step in steps:
+            step['covered_by'] = tuple(name for name in DETECTORS[step['detector']]['covered_by'] if name in names)
+        plan = {
+            'prompt': prompt,
+            'steps': steps,
+            'blur_whole_frame': blur_whole_frame
+        }
         
-        return frame
+        if len(self.plan_cache) >= 32:
+            self.plan_cache.clear()
+        self.plan_cache[prompt] = plan
+        return plan
+    
+    def step_cost(self, step):
+        """Measured cost of a step in ms, or its budget until it has run"""
+        return self.detector_costs.get(step['name'], step['budget_ms'])
+    
+    def describe_plan(self, plan):
+        """A plan with its steps cheapest first and estimated ms per pass, from current costs"""
+        steps = sorted(plan['steps'], key=self.step_cost)  # ties keep prompt order
+        return {
+            'prompt': plan['prompt'],
+            'steps': [dict(step, cost_ms=round(self.step_cost(step), 2)) for step in steps],
+            'blur_whole_frame': plan['blur_whole_frame'],
+            'estimated_ms': round(sum(self.step_cost(step) / step['every'] for step in steps), 1)
+        }
+    
+    def run_detector(self, step, frame, features):
+        """Run one plan step, returns its boxes"""
+        detector = step['detector']
+        if detector == 'faces':
+            return [tuple(box) for box in self.detect_faces(frame, features, step['width'])]
+        if detector == 'eyes':
+            return [tuple(box) for box in self.detect_eyes(frame, features, step['width'])]
+        if detector == 'bodies':
+            return [tuple(box) for box in self.detect_bodies(frame, features, step['width'])]
+        if detector == 'color':
+            boxes = []
+            for contours in self.detect_color_regions(frame, step['colors'], features).values():
+                for contour in contours:
+                    x, y, w, h = cv2.boundingRect(contour)
+                    if w > 20 and h > 20:  # Filter small regions
+                        boxes.append((x, y, w, h))
+            return boxes
+        if detector == 'text':
+            return self.detect_text_regions(frame, features)
+        if detector == 'license_plates':
+            return self.detect_license_plates(frame, features)
+        return []
+    
+    def enable_parallel(self, workers=4):
+        """Run each frame's detectors on a fixed-size thread pool (OpenCV releases the GIL)"""
+        self.disable_parallel()
+        if workers > 1:
+            # Every pool thread loads its own cascades once, up front
+            self.detection_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='detector',
+                                                     initializer=get_registry().preload,
+                                                     initargs=(['face', 'eye', 'body'],))
+            self.detection_workers = workers
+    
+    def disable_parallel(self):
+        """Go back to running detectors one after another"""
+        if self.detection_pool:
+            self.detection_pool.shutdown(wait=True)
+        self.detection_pool = None
+        self.detection_workers = 1
+    
+    def timed_step(self, step, frame, features):
+        start = time.perf_counter()
+        boxes = self.run_detector(step, frame, features)
+        return boxes, (time.perf_counter() - start) * 1000
+    
+    def finish_step(self, step, boxes, elapsed):
+        """Store a step's boxes and record its cost against its budget"""
+        name = step['name']
+        stats = self.scheduler_stats.setdefault(name, {'runs': 0, 'reused': 0, 'deferred': 0, 'overruns': 0})
+        self.step_boxes[name] = boxes
+        self.step_last_run[name] = self.detection_round
+        stats['runs'] += 1
+        if elapsed > step['budget_ms']:
+            stats['overruns'] += 1
+        previous = self.detector_costs.get(name)
+        self.detector_costs[name] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+    
+    def detect_regions(self, frame, plan):
+        """Run the due steps of a detection plan, returns ([(stat_key, bbox), ...], blur_whole_frame)
+        
+        A step is due once `every` detection passes have gone by since it last
+        ran. Due steps run most overdue first, then cheapest first, until the
+        per-frame detection budget would be exceeded (the first one always
+        runs); the rest stay due for the next pass. Steps that don't run
+        reuse their last boxes. Boxes lying inside a box of a covering step
+        (covered_by) are dropped. With a detection pool the selected steps run
+        concurrently and the budget applies to their estimated wall time.
+        """
+        features = FrameFeatures(frame)  # gray/HSV/edges computed once, whatever the prompt needs
+        regions = []
+        spent = 0.0
+        
+        def overdue(step):
+            last = self.step_last_run.get(step['name'])
+            return None if last is None else self.detection_round - last - step['every']
+        
+        due = [step for step in plan['steps'] if overdue(step) is None or overdue(step) >= 0]
+        due.sort(key=lambda step: (-(overdue(step) if overdue(step) is not None else float('inf')), self.step_cost(step)))
+        ran = set()
+        
+        if self.detection_pool:
+            # Pick steps up front from their estimates: wall time is the longest step or the
+            # total spread over the workers, whichever is larger
+            selected = []
+            for step in due:
+                estimates = [self.step_cost(s) for s in selected + [step]]
+                if selected and max(max(estimates), sum(estimates) / self.detection_workers) > self.detection_budget_ms:
+                    self.scheduler_stats.setdefault(step['name'], {'runs': 0, 'reused': 0, 'deferred': 0, 'overruns': 0})['deferred'] += 1
+                    continue
+                selected.append(step)
+            
+            start = time.perf_counter()
+            futures = [self.detection_pool.submit(self.timed_step, step, frame, features) for step in selected]
+            results = [future.result() for future in futures]
+            spent = (time.perf_counter() - start) * 1000
+            
+            for step, (boxes, elapsed) in zip(selected, results):
+                self.finish_step(step, boxes, elapsed)
+                ran.add(step['name'])
+            if selected:
+                serial = sum(elapsed for _, elapsed in results)
+                self.parallel_stats['frames'] += 1
+                self.parallel_stats['wall_ms'] += spent
+                self.parallel_stats['serial_ms'] += serial
+        else:
+            for step in due:
+                estimate = self.step_cost(step)
+                if spent and spent + estimate > self.detection_budget_ms:
+                    self.scheduler_stats.setdefault(step['name'], {'runs': 0, 'reused': 0, 'deferred': 0, 'overruns': 0})['deferred'] += 1
+                    continue
+                boxes, elapsed = self.timed_step(step, frame, features)
+                spent += elapsed
+                self.finish_step(step, boxes, elapsed)
+                ran.add(step['name'])
+        
+        # Merge in plan order so the region list doesn't depend on scheduling or thread timing
+        for step in plan['steps']:
+            name = step['name']
+            if name not in ran:
+                self.scheduler_stats.setdefault(name, {'runs': 0, 'reused': 0, 'deferred': 0, 'overruns': 0})['reused'] += 1
+            covering = [box for other in step['covered_by'] for box in self.step_boxes.get(other, [])]
+            regions.extend((step['stat_key'], box) for box in self.step_boxes.get(name, [])
+                           if not is_covered(box, covering))
+        
+        if spent > self.detection_budget_ms:
+            self.frames_over_budget += 1
+        self.detection_round += 1
+        self.record_features(features)
+        return regions, plan['blur_whole_frame']
+    
+    def record_features(self, features):
+        """Accumulate how often each shared feature was computed and what it cost"""
+        for name, ms in features.timings.items():
+            entry = self.feature_stats.setdefault(name, {'computed': 0, 'total_ms': 0.0})
+            entry['computed'] += 1
+            entry['total_ms'] += ms
     
     def process_frame_with_prompt(self, frame, prompt):
-        """Process frame based on custom prompt"""
-        detection_types = self.parse_prompt(prompt)
-        processed_frame = frame.copy()
+        """Process frame based on custom prompt (the result is reused by the next call)"""
+        processed_frame = self.compositor.output(frame)
         
         # Reset stats for this frame
         frame_stats = {
@@ -206,50 +441,29 @@ class RobotEnhancedBlur:
             'color_regions': 0
         }
         
-        # Apply detections based on prompt
-        for detection_type in detection_types:
-            if detection_type == 'faces':
-                faces = self.detect_faces(frame)
-                for (x, y, w, h) in faces:
-                    processed_frame = self.apply_blur(processed_frame, (x, y, w, h), 'gaussian')
-                    frame_stats['faces'] += 1
-            
-            elif detection_type == 'eyes':
-                eyes = self.detect_eyes(frame)
-                for (x, y, w, h) in eyes:
-                    processed_frame = self.apply_blur(processed_frame, (x, y, w, h), 'gaussian')
-                    frame_stats['eyes'] += 1
-            
-            elif detection_type == 'bodies':
-                bodies = self.detect_bodies(frame)
-                for (x, y, w, h) in bodies:
-                    processed_frame = self.apply_blur(processed_frame, (x, y, w, h), 'gaussian')
-                    frame_stats['bodies'] += 1
-            
-            elif detection_type.startswith('color_'):
-                color_name = detection_type.replace('color_', '')
-                color_contours = self.detect_colors(frame, color_name)
-                for contour in color_contours:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    if w > 20 and h > 20:  # Filter small regions
-                        processed_frame = self.apply_blur(processed_frame, (x, y, w, h), 'gaussian')
-                        frame_stats['color_regions'] += 1
-            
-            elif detection_type == 'text':
-                text_regions = self.detect_text_regions(frame)
-                for (x, y, w, h) in text_regions:
-                    processed_frame = self.apply_blur(processed_frame, (x, y, w, h), 'gaussian')
-                    frame_stats['text_regions'] += 1
-            
-            elif detection_type == 'license_plates':
-                plates = self.detect_license_plates(frame)
-                for (x, y, w, h) in plates:
-                    processed_frame = self.apply_blur(processed_frame, (x, y, w, h), 'gaussian')
-                    frame_stats['license_plates'] += 1
-            
-            elif detection_type == 'sensitive':
-                # For sensitive content, blur the entire frame
-                processed_frame = cv2.GaussianBlur(processed_frame, (self.blur_strength, self.blur_strength), 0)
+        # Static scenes reuse the previous detections; motion or driving forces a refresh
+        should_detect, reason = self.motion_gate.check(frame)
+        if should_detect or self.last_detection is None or self.last_detection[0] != prompt:
+            plan = self.compile_prompt(prompt)
+            if self.last_detection is not None and self.last_detection[0] != prompt:
+                self.step_boxes = {}  # boxes from the previous prompt's detectors are stale
+                self.step_last_run = {}
+            regions, blur_whole_frame = self.detect_regions(frame, plan)
+            self.last_detection = (prompt, regions, blur_whole_frame)
+            self.motion_gate.mark_detected(frame)
+        else:
+            _, regions, blur_whole_frame = self.last_detection
+        
+        # Count every detection, but blur each covered pixel once
+        for stat_key, bbox in regions:
+            frame_stats[stat_key] += 1
+        blur_boxes = consolidate_boxes([bbox for _, bbox in regions]) if not blur_whole_frame else []
+        self.compositor.apply(processed_frame, blur_boxes)
+        self.blur_stats['detections'] += len(regions)
+        self.blur_stats['blurred'] += len(blur_boxes)
+        
+        if blur_whole_frame:
+            self.compositor.apply(processed_frame, [(0, 0, frame.shape[1], frame.shape[0])])
         
         # Update global stats
         for key, value in frame_stats.items():
@@ -301,6 +515,7 @@ class RobotEnhancedBlur:
         
         try:
             while self.is_streaming:
+                frame_start = time.time()
                 ret, frame = cap.read()
                 if not ret:
                     print("❌ Failed to read frame")
@@ -331,7 +546,8 @@ class RobotEnhancedBlur:
                 elif key == ord('s'):
                     self.stop_recording()
                 
-                time.sleep(0.03)  # ~30 FPS
+                # Sleep only what is left of the frame interval (~30 FPS)
+                time.sleep(max(0.0, 1.0 / self.target_fps - (time.time() - frame_start)))
                 
         except KeyboardInterrupt:
             print("\n⏹️  Stopping robot stream...")
@@ -394,13 +610,75 @@ class RobotEnhancedBlur:
         # Clear recorded frames
         self.recorded_frames = []
     
+    def benchmark_parallel(self, frame, prompt, repeats=10):
+        """Time every step of a prompt's plan run sequentially and on the pool, on one frame"""
+        plan = self.compile_prompt(prompt)
+        pool = self.detection_pool or ThreadPoolExecutor(max_workers=4, thread_name_prefix='detector',
+                                                         initializer=get_registry().preload,
+                                                         initargs=(['face', 'eye', 'body'],))
+        timings = {}
+        for mode in ('sequential', 'parallel'):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                features = FrameFeatures(frame)
+                if mode == 'sequential':
+                    results = [self.run_detector(step, frame, features) for step in plan['steps']]
+                else:
+                    futures = [pool.submit(self.run_detector, step, frame, features) for step in plan['steps']]
+                    results = [future.result() for future in futures]
+            timings[mode] = (time.perf_counter() - start) * 1000 / repeats
+        if pool is not self.detection_pool:
+            pool.shutdown(wait=True)
+        
+        return {
+            'steps': [step['name'] for step in plan['steps']],
+            'sequential_ms': round(timings['sequential'], 2),
+            'parallel_ms': round(timings['parallel'], 2),
+            'speedup': round(timings['sequential'] / timings['parallel'], 2) if timings['parallel'] else None,
+            'boxes': sum(len(boxes) for boxes in results)
+        }
+    
+    def get_parallel_stats(self):
+        """Per-frame wall time of parallel detection against the summed per-detector time
+        
+        Detectors slow each other down when they share cores, so the summed
+        time overstates the sequential path; benchmark_parallel() measures both.
+        """
+        frames = self.parallel_stats['frames']
+        wall, serial = self.parallel_stats['wall_ms'], self.parallel_stats['serial_ms']
+        return {
+            'workers': self.detection_workers,
+            'frames': frames,
+            'avg_wall_ms': round(wall / frames, 2) if frames else None,
+            'avg_summed_ms': round(serial / frames, 2) if frames else None,
+            'speedup': round(serial / wall, 2) if wall else None
+        }
+    
     def get_detection_summary(self):
         """Get summary of all detections"""
         total_frames = self.frame_count
         summary = {
             'total_frames': total_frames,
             'detection_stats': self.detection_stats.copy(),
-            'current_prompt': self.current_prompt
+            'current_prompt': self.current_prompt,
+            'motion_gate': self.motion_gate.get_stats(),
+            'detection_width': self.detection_width,
+            'plan': self.describe_plan(self.compile_prompt(self.current_prompt)),
+            'measured_detector_ms': {name: round(ms, 2) for name, ms in self.detector_costs.items()},
+            'scheduler': {
+                'detection_budget_ms': round(self.detection_budget_ms, 1),
+                'frames_over_budget': self.frames_over_budget,
+                'detectors': {name: dict(stats) for name, stats in self.scheduler_stats.items()}
+            },
+            'parallel': self.get_parallel_stats(),
+            'blur_regions': dict(self.blur_stats),
+            'compositor': self.compositor.get_stats(),
+            'color_pixels': dict(self.color_pixel_counts),
+            'detector_costs': get_registry().get_cost_stats(),
+            'features': {
+                name: {'computed': entry['computed'], 'avg_ms': round(entry['total_ms'] / entry['computed'], 2)}
+                for name, entry in self.feature_stats.items()
+            }
         }
         
         if total_frames > 0:
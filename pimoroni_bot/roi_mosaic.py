@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+import cv2
+import numpy as np
+
+def _overlaps(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+def _union(a, b):
+    x1, y1 = min(a[0], b[0]), min(a[1], b[1])
+    x2, y2 = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return (x1, y1, x2 - x1, y2 - y1)
+
+def propose_regions(frame_shape, boxes, margin=0.25, min_size=48, max_regions=8, max_area_fraction=0.5):
+    """Grow candidate boxes by a margin and merge overlaps into crop regions
+
+    Returns None when cropping would not pay off (too many regions or most
+    of the frame covered), so the caller can send the whole frame instead.
+    """
+    height, width = frame_shape[:2]
+    regions = []
+    for x, y, w, h in boxes:
+        pad_x = max(w * margin, (min_size - w) / 2, 0)
+        pad_y = max(h * margin, (min_size - h) / 2, 0)
+        x1, y1 = max(0, int(x - pad_x)), max(0, int(y - pad_y))
+        x2, y2 = min(width, int(x + w + pad_x)), min(height, int(y + h + pad_y))
+        if x2 > x1 and y2 > y1:
+            regions.append((x1, y1, x2 - x1, y2 - y1))
+
+    # Merge until no two regions overlap
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                if _overlaps(regions[i], regions[j]):
+                    regions[i] = _union(regions[i], regions.pop(j))
+                    merged = True
+                    break
+            if merged:
+                break
+
+    area = sum(w * h for _, _, w, h in regions)
+    if not regions or len(regions) > max_regions or area > max_area_fraction * width * height:
+        return None
+    return sorted(regions, key=lambda r: -r[3])
+
+class RoiMosaic:
+    """Packs crop regions of a frame into one small image and maps boxes back
+
+    Crops keep their native resolution unless they are wider than the
+    mosaic or taller than a tile row, so small faces and cards are not
+    shrunk along with the rest of the frame. Tiles are shelf-packed with a
+    gray gap so the model does not join objects across crops.
+    """
+
+    def __init__(self, frame, regions, width=480, max_tile_height=240, gap=8):
+        self.frame_shape = frame.shape
+        self.tiles = []
+
+        x_cursor, y_cursor, row_height = 0, 0, 0
+        for region in regions:
+            rx, ry, rw, rh = region
+            scale = min(1.0, width / rw, max_tile_height / rh)
+            tw, th = max(1, int(rw * scale)), max(1, int(rh * scale))
+            if x_cursor and x_cursor + tw > width:
+                x_cursor, y_cursor, row_height = 0, y_cursor + row_height + gap, 0
+            self.tiles.append({'region': region, 'offset': (x_cursor, y_cursor), 'size': (tw, th), 'scale': scale})
+            x_cursor += tw + gap
+            row_height = max(row_height, th)
+
+        mosaic_height = y_cursor + row_height
+        mosaic_width = max([t['offset'][0] + t['size'][0] for t in self.tiles] or [1])
+        self.image = np.full((max(mosaic_height, 1), mosaic_width, 3), 128, dtype=np.uint8)
+        for tile in self.tiles:
+            rx, ry, rw, rh = tile['region']
+            ox, oy = tile['offset']
+            tw, th = tile['size']
+            crop = frame[ry:ry+rh, rx:rx+rw]
+            if (tw, th) != (rw, rh):
+                crop = cv2.resize(crop, (tw, th), interpolation=cv2.INTER_AREA)
+            self.image[oy:oy+th, ox:ox+tw] = crop
+
+    def map_detections(self, detections):
+        """Move mosaic-pixel detections back to frame coordinates, dropping boxes between tiles"""
+        mapped = []
+        for detection in detections:
+            x, y, w, h = detection['bbox']
+            cx, cy = x + w / 2, y + h / 2
+            for tile in self.tiles:
+                ox, oy = tile['offset']
+                tw, th = tile['size']
+                if not (ox <= cx < ox + tw and oy <= cy < oy + th):
+                    continue
+                # Clip to the tile, then undo its placement and scale
+                x1, y1 = max(x, ox), max(y, oy)
+                x2, y2 = min(x + w, ox + tw), min(y + h, oy + th)
+                rx, ry = tile['region'][:2]
+                scale = tile['scale']
+                result = dict(detection)
+                result['bbox'] = (int(rx + (x1 - ox) / scale), int(ry + (y1 - oy) / scale),
+                                  int((x2 - x1) / scale), int((y2 - y1) / scale))
+                mapped.append(result)
+                break
+        return mapped
+
+    def area_fraction(self):
+        """Fraction of the frame area covered by the crops"""
+        height, width = self.frame_shape[:2]
+        return sum(t['region'][2] * t['region'][3] for t in self.tiles) / float(width * height)
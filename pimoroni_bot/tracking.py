@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+import cv2
+import numpy as np
+
+class BoxTracker:
+    """Propagates detection boxes between keyframes with sparse optical flow
+
+    Each box from the last Gemini/Haar keyframe is seeded with corner
+    features. Every frame the features are tracked with pyramidal
+    Lucas-Kanade (forward-backward checked) and the box is moved and scaled
+    by the median motion of its surviving points. The tracker asks for a new
+    detection when a box loses too many points or the keyframe gets old.
+    """
+
+    def __init__(self, max_keyframe_age=300, min_points=4, min_survival=0.5, max_fb_error=2.0):
+        self.max_keyframe_age = max_keyframe_age  # frames before a refresh is forced
+        self.min_points = min_points
+        self.min_survival = min_survival
+        self.max_fb_error = max_fb_error
+        self.lk_params = dict(winSize=(21, 21), maxLevel=3,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+        self.tracks = []
+        self.prev_gray = None
+        self.keyframe_age = 0
+
+    def _to_gray(self, frame):
+        if frame.ndim == 2:
+            return frame
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def _seed_points(self, gray, bbox):
+        """Pick trackable points inside a box, falling back to a grid on flat regions"""
+        x, y, w, h = [int(v) for v in bbox]
+        height, width = gray.shape[:2]
+        x, y = max(0, x), max(0, y)
+        w, h = min(w, width - x), min(h, height - y)
+        if w <= 2 or h <= 2:
+            return np.empty((0, 1, 2), dtype=np.float32)
+
+        points = cv2.goodFeaturesToTrack(gray[y:y+h, x:x+w], maxCorners=30, qualityLevel=0.01, minDistance=5)
+        if points is None or len(points) < self.min_points:
+            gx, gy = np.meshgrid(np.linspace(w * 0.2, w * 0.8, 4), np.linspace(h * 0.2, h * 0.8, 4))
+            points = np.stack([gx.ravel(), gy.ravel()], axis=1).reshape(-1, 1, 2)
+        points = points.astype(np.float32)
+        points[:, 0, 0] += x
+        points[:, 0, 1] += y
+        return points
+
+    def reset(self, frame, detections):
+        """Start a new keyframe from fresh detections"""
+        gray = self._to_gray(frame)
+        self.tracks = []
+        for detection in detections:
+            points = self._seed_points(gray, detection['bbox'])
+            self.tracks.append({
+                'detection': dict(detection),
+                'bbox': np.array(detection['bbox'], dtype=np.float32),
+                'points': points,
+                'seeded': len(points),
+                'lost': len(points) < self.min_points
+            })
+        self.prev_gray = gray
+        self.keyframe_age = 0
+
+    def update(self, frame):
+        """Move every tracked box onto this frame and return the propagated detections"""
+        gray = self._to_gray(frame)
+        self.keyframe_age += 1
+
+        live = [t for t in self.tracks if not t['lost'] and len(t['points'])]
+        if self.prev_gray is None or self.prev_gray.shape != gray.shape or not live:
+            self.prev_gray = gray
+            return self.get_detections()
+
+        # Track all points of all boxes in one call, checked forward and backward
+        p0 = np.concatenate([t['points'] for t in live])
+        p1, st, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, p0, None, **self.lk_params)
+        p0r, st_back, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, p1, None, **self.lk_params)
+        fb_error = np.linalg.norm((p0 - p0r).reshape(-1, 2), axis=1)
+        good = (st.ravel() == 1) & (st_back.ravel() == 1) & (fb_error < self.max_fb_error)
+
+        offset = 0
+        for track in live:
+            count = len(track['points'])
+            keep = good[offset:offset + count]
+            old = track['points'][keep].reshape(-1, 2)
+            new = p1[offset:offset + count][keep].reshape(-1, 2)
+            offset += count
+
+            if len(new) < self.min_points or len(new) < self.min_survival * track['seeded']:
+                # Keep blurring the last known position until a new detection arrives
+                track['lost'] = True
+                continue
+
+            # Median translation plus median spread ratio for scale
+            dx, dy = np.median(new - old, axis=0)
+            old_spread = np.linalg.norm(old - old.mean(axis=0), axis=1)
+            new_spread = np.linalg.norm(new - new.mean(axis=0), axis=1)
+            valid = old_spread > 1e-3
+            scale = float(np.median(new_spread[valid] / old_spread[valid])) if valid.any() else 1.0
+            scale = min(max(scale, 0.8), 1.25)
+
+            x, y, w, h = track['bbox']
+            cx, cy = x + w / 2 + dx, y + h / 2 + dy
+            w, h = w * scale, h * scale
+            track['bbox'] = np.array([cx - w / 2, cy - h / 2, w, h], dtype=np.float32)
+            track['points'] = new.reshape(-1, 1, 2)
+
+        self.prev_gray = gray
+        return self.get_detections()
+
+    def get_detections(self):
+        """Current box for every track, in the same format as the detector output"""
+        detections = []
+        for track in self.tracks:
+            detection = dict(track['detection'])
+            detection['bbox'] = tuple(int(round(v)) for v in track['bbox'])
+            detection['tracked'] = not track['lost']
+            detections.append(detection)
+        return detections
+
+    def needs_detection(self):
+        """Decide whether a new keyframe is needed, returns (needed, reason)"""
+        if self.prev_gray is None:
+            reason = 'no_keyframe'
+        elif self.keyframe_age >= self.max_keyframe_age:
+            reason = 'keyframe_age'
+        elif any(t['lost'] for t in self.tracks):
+            reason = 'track_lost'
+        else:
+            return False, None
+        return True, reason
+
+    def get_stats(self):
+        """Get tracker statistics"""
+        return {
+            'tracks': len(self.tracks),
+            'lost_tracks': sum(1 for t in self.tracks if t['lost']),
+            'keyframe_age': self.keyframe_age
+        }
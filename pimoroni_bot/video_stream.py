@@ -5,6 +5,10 @@ import threading
 import os
 import requests
 from pimoroni_bot.config import TWELVELABS_API_KEY
+from pimoroni_bot.frame_hub import FrameHub, CaptureThread, ProcessingThread
+from pimoroni_bot.motion import notify_robot_motion
+from pimoroni_bot.detectors import detect, get_registry
+from pimoroni_bot.regions import consolidate_boxes
 import numpy as np
 import base64
 import time
@@ -47,7 +51,24 @@ VIDEO_PATH = "recorded_video.mp4"
 BLURRED_PATH = "blurred_video.mp4"
 
 app = Flask(__name__)
-cap = cv2.VideoCapture(0)
+
+# Single capture thread owns the camera; every consumer subscribes to the hub
+frame_hub = FrameHub('capture')
+capture_thread = None
+capture_lock = threading.Lock()
+
+# Blurred + JPEG-encoded frames, produced once and shared by every viewer
+stream_hub = FrameHub('stream')
+processing_thread = None
+
+def ensure_capture_started():
+    """Start the shared capture thread on first use"""
+    global capture_thread
+    with capture_lock:
+        if capture_thread is None or not capture_thread.is_alive():
+            capture_thread = CaptureThread(frame_hub, camera_index=0)
+            capture_thread.start()
+    return frame_hub
 
 RECORD_VIDEO = False
 out = None
@@ -70,30 +91,35 @@ analysis_results = []
 
 # Motor control functions
 def move_forward(speed=0.5):
+    notify_robot_motion('forward')
     if TRILOBOT_AVAILABLE:
         tbot.forward(speed)
     else:
         print(f"SIMULATION: Moving forward at speed {speed}")
 
 def move_backward(speed=0.5):
+    notify_robot_motion('backward')
     if TRILOBOT_AVAILABLE:
         tbot.backward(speed)
     else:
         print(f"SIMULATION: Moving backward at speed {speed}")
 
 def turn_left(speed=0.5):
+    notify_robot_motion('left')
     if TRILOBOT_AVAILABLE:
         tbot.turn_left(speed)
     else:
         print(f"SIMULATION: Turning left at speed {speed}")
 
 def turn_right(speed=0.5):
+    notify_robot_motion('right')
     if TRILOBOT_AVAILABLE:
         tbot.turn_right(speed)
     else:
         print(f"SIMULATION: Turning right at speed {speed}")
 
 def stop_motors():
+    notify_robot_motion('stop')
     if TRILOBOT_AVAILABLE:
         tbot.stop()
     else:
@@ -120,10 +146,12 @@ def record_robot_segment():
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
     out = cv2.VideoWriter(segment_path, fourcc, 20.0, (640, 480))
     
+    hub = ensure_capture_started()
     start_time = time.time()
+    last_seq = 0
     while time.time() - start_time < RECORDING_DURATION:
-        ret, frame = cap.read()
-        if ret:
+        last_seq, frame = hub.wait_for_frame(last_seq)
+        if frame is not None:
             out.write(frame)
     
     out.release()
@@ -324,38 +352,46 @@ def blur_with_gemini(frame, prompt):
         return frame
     
     try:
-        # Process frame with Gemini
-        processed_frame, frame_stats = gemini_blur.process_frame_with_gemini(frame, prompt)
+        # Detection runs on a background worker so API latency never stalls the stream
+        processed_frame, frame_stats = gemini_blur.process_frame_async(frame, prompt)
         return processed_frame
     except Exception as e:
         print(f"❌ Gemini blur failed: {e}")
         return frame
 
 # --- Video stream generator ---
-def gen_frames():
-    global last_recording_time
+def process_stream_frame(frame):
+    """Blur a captured frame for the live stream (runs once per frame, not per viewer)"""
+    # Check if we should record a segment
+    if should_record_segment():
+        threading.Thread(target=record_robot_segment).start()
     
-    while True:
-        success, frame = cap.read()
-        if not success:
-            break
-            
-        # Check if we should record a segment
-        if should_record_segment():
-            threading.Thread(target=record_robot_segment).start()
-        
-        if DETECTION_MODE == 'local':
-            frame = blur_faces(frame)
-        elif DETECTION_MODE == 'api' and DETECTION_PROMPT:
-            frame = blur_with_api(frame, DETECTION_PROMPT)
-        elif DETECTION_MODE == 'gemini' and gemini_blur and GEMINI_AVAILABLE:
-            frame = blur_with_gemini(frame, DETECTION_PROMPT)
-        if RECORD_VIDEO and out:
-            out.write(frame)
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame = buffer.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+    if DETECTION_MODE == 'local':
+        frame = blur_faces(frame)
+    elif DETECTION_MODE == 'api' and DETECTION_PROMPT:
+        frame = blur_with_api(frame, DETECTION_PROMPT)
+    elif DETECTION_MODE == 'gemini' and gemini_blur and GEMINI_AVAILABLE:
+        frame = blur_with_gemini(frame, DETECTION_PROMPT)
+    if RECORD_VIDEO and out:
+        out.write(frame)
+    return frame
+
+def ensure_stream_started():
+    """Start the shared blur/encode stage on first use"""
+    global processing_thread
+    ensure_capture_started()
+    with capture_lock:
+        if processing_thread is None or not processing_thread.is_alive():
+            # The stream thread loads its own cascades before the first frame
+            processing_thread = ProcessingThread(frame_hub, stream_hub, process_stream_frame,
+                                                 on_start=lambda: get_registry().preload(['face']))
+            processing_thread.start()
+    return stream_hub
+
+def gen_frames():
+    hub = ensure_stream_started()
+    for _, chunk in hub.subscribe():
+        yield chunk
 
 @app.route('/video_feed')
 def video_feed():
@@ -441,9 +477,6 @@ def detect_and_blur_locally(video_path, detection_types):
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
     out = cv2.VideoWriter(BLURRED_PATH, fourcc, 20.0, (640, 480))
     
-    # Load detection models
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-    
     frame_idx = 0
     while True:
         ret, frame = cap.read()
@@ -453,8 +486,8 @@ def detect_and_blur_locally(video_path, detection_types):
         # Apply detection based on TwelveLabs analysis
         if "faces" in detection_types:
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-            for (x, y, w, h) in faces:
+            faces = detect('face', gray)
+            for (x, y, w, h) in consolidate_boxes(faces):
                 roi = frame[y:y+h, x:x+w]
                 roi = cv2.GaussianBlur(roi, (51, 51), 0)
                 frame[y:y+h, x:x+w] = roi
@@ -477,16 +510,16 @@ def record_and_analyze():
     prompt = data.get('prompt', '').strip() or 'Analyze this video for faces, license plates, and sensitive content'
     duration = int(data.get('duration', 10))  # seconds
     
-    # 1. Record video
-    cap = cv2.VideoCapture(0)
+    # 1. Record video from the shared capture thread
+    hub = ensure_capture_started()
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
     out = cv2.VideoWriter(VIDEO_PATH, fourcc, 20.0, (640, 480))
     start = time.time()
+    last_seq = 0
     while time.time() - start < duration:
-        ret, frame = cap.read()
-        if ret:
+        last_seq, frame = hub.wait_for_frame(last_seq)
+        if frame is not None:
             out.write(frame)
-    cap.release()
     out.release()
     
     # 2. Analyze with TwelveLabs
@@ -989,6 +1022,14 @@ def system_status():
         'twelvelabs_available': bool(TWELVELABS_API_KEY),
         'detection_mode': DETECTION_MODE,
         'detection_prompt': DETECTION_PROMPT,
+        'stream': {
+            'capture': frame_hub.get_stats(),
+            'output': stream_hub.get_stats(),
+            'processing': processing_thread.get_stats() if processing_thread else None
+        },
+        'gemini_worker': gemini_blur.detection_worker.get_stats() if gemini_blur and gemini_blur.detection_worker else None,
+        'gemini_api': gemini_blur.api_guard.get_stats() if gemini_blur else None,
+        'detectors': get_registry().get_stats(),
         'recording_status': {
             'is_recording': ROBOT_RECORDING,
             'last_recording': last_recording_time,
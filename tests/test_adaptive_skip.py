@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+from pimoroni_bot.adaptive_skip import AdaptiveFrameSkip
+
+def test_skip_grows_with_latency_and_decays_when_fast_again():
+    """Requests slower than the freshness budget stretch the interval; fast ones shrink it back"""
+    controller = AdaptiveFrameSkip(target_freshness=2.0, max_requests_per_second=1.0, smoothing=0.5)
+    assert controller.frame_skip == 60  # 2 s at the default 30 fps
+
+    for _ in range(10):
+        controller.record_call(4.0)
+    slow = controller.frame_skip
+    assert slow > 110  # never overlap 4 s requests
+
+    for _ in range(10):
+        controller.record_call(0.5)
+    assert controller.frame_skip < slow
+    assert abs(controller.frame_skip - 45) <= 1  # freshness budget minus 0.5 s latency
+
+def test_skip_backs_off_while_failing():
+    """Failed calls raise the interval, successes bring it back down"""
+    controller = AdaptiveFrameSkip(target_freshness=2.0, smoothing=0.5)
+    for _ in range(3):
+        controller.record_call(0.5, ok=False)
+    failing = controller.frame_skip
+    assert failing > 60
+    for _ in range(10):
+        controller.record_call(0.5)
+    assert controller.frame_skip < failing
+    assert controller.get_stats()['errors'] == 3
+
+def test_frames_follow_measured_fps():
+    """The same interval covers fewer frames on a slower camera"""
+    controller = AdaptiveFrameSkip(target_freshness=2.0, max_requests_per_second=1.0, smoothing=0.5)
+    for idx in range(40):
+        controller.record_frame(timestamp=idx / 10.0)
+    assert abs(controller.get_stats()['capture_fps'] - 10.0) < 0.5
+    assert controller.frame_skip == 20
+    assert controller.min_frames in (10, 11)  # ceil of a smoothed ~10 fps
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from pimoroni_bot.blur_backends import BLUR_BACKENDS, BlurBackendSelector, blur_gaussian
+
+def test_backends_approximate_the_gaussian():
+    """Every backend keeps the shape and stays close to the exact Gaussian"""
+    roi = np.random.RandomState(0).randint(0, 255, (120, 160, 3), dtype=np.uint8)
+    reference = blur_gaussian(roi, 51).astype(np.float32)
+    for name, blur in BLUR_BACKENDS.items():
+        blurred = blur(roi, 51)
+        assert blurred.shape == roi.shape, name
+        assert np.abs(blurred.astype(np.float32) - reference).mean() < 5.0, name
+
+def test_selector_trades_quality_for_budget():
+    """Small areas get the exact Gaussian, areas over budget a cheaper backend"""
+    selector = BlurBackendSelector(budget_ms=5.0)
+    selector.ms_per_mpixel = {name: 100.0 for name in BLUR_BACKENDS}
+    selector.ms_per_mpixel.update({'gaussian': 200.0, 'downscale': 5.0})
+    assert selector.choose(10000) == 'gaussian'
+    assert selector.choose(640 * 480) == 'downscale'
+    assert selector.choose(10 ** 7) == 'downscale' and selector.over_budget == 1
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import cv2
+import numpy as np
+
+from pimoroni_bot.color_segmentation import ColorSegmenter
+
+COLOR_RANGES = {
+    'red': [([0, 100, 100], [10, 255, 255]), ([160, 100, 100], [180, 255, 255])],
+    'blue': [([100, 100, 100], [130, 255, 255])],
+    'black': [([0, 0, 0], [180, 255, 30])]
+}
+
+def test_labels_match_in_range():
+    """One label pass agrees with per-range inRange masks for disjoint colours"""
+    hsv = np.random.RandomState(0).randint(0, 256, (120, 160, 3), dtype=np.uint8)
+    hsv[:, :, 0] %= 180
+    labels, counts = ColorSegmenter(COLOR_RANGES).segment(hsv, ['red', 'blue', 'black'])
+    for label, color in enumerate(['red', 'blue', 'black'], 1):
+        expected = np.zeros(hsv.shape[:2], dtype=bool)
+        for lower, upper in COLOR_RANGES[color]:
+            expected |= cv2.inRange(hsv, np.array(lower), np.array(upper)) > 0
+        assert np.array_equal(labels == label, expected), color
+        assert counts[color] == expected.sum()
+
+def test_contours_per_class():
+    """Each requested colour gets its own contours from the shared label image"""
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+    frame[10:40, 10:40] = (0, 0, 255)  # red in BGR
+    frame[60:90, 60:90] = (255, 0, 0)  # blue
+    segmenter = ColorSegmenter(COLOR_RANGES)
+    colors = ('red', 'blue')
+    labels, counts = segmenter.segment(cv2.cvtColor(frame, cv2.COLOR_BGR2HSV), colors)
+    found = segmenter.contours(labels, colors, counts)
+    assert counts == {'red': 900, 'blue': 900}
+    assert cv2.boundingRect(found['red'][0]) == (10, 10, 30, 30)
+    assert cv2.boundingRect(found['blue'][0]) == (60, 60, 30, 30)
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from pimoroni_bot.compositor import BlurCompositor
+
+def test_only_masked_pixels_change():
+    """Pixels between boxes inside the blurred union keep their original values"""
+    frame = np.random.RandomState(0).randint(0, 255, (120, 160, 3), dtype=np.uint8)
+    compositor = BlurCompositor(strength=11)
+    out = compositor.apply(compositor.output(frame), [(10, 10, 40, 40), (45, 10, 40, 40)])
+    assert out is compositor.buffer
+    assert compositor.effect_passes == 1
+    assert np.array_equal(out[60:, :], frame[60:, :])
+    assert not np.array_equal(out[10:50, 10:85], frame[10:50, 10:85])
+
+def test_fill_modes_and_buffer_reuse():
+    """Black and white fill exactly the boxes, and the output buffer is reused across frames"""
+    frame = np.full((60, 80, 3), 128, dtype=np.uint8)
+    compositor = BlurCompositor()
+    out = compositor.apply(compositor.output(frame), [(0, 0, 10, 10)], 'black')
+    assert out[:10, :10].max() == 0 and out[10:, 10:].min() == 128
+    again = compositor.apply(compositor.output(frame), [(70, 50, 20, 20)], 'white')
+    assert again is out
+    assert again[:10, :10].min() == 128 and again[50:, 70:].min() == 255
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from pimoroni_bot.detection_cache import DetectionCache, hamming_distance, perceptual_hash, normalize_prompt
+
+def make_frame(seed):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 255, (48, 64, 3), dtype=np.uint8)
+
+def test_near_duplicate_frames_hit():
+    """Slightly noisy copies of a frame reuse its detections"""
+    cache = DetectionCache(max_distance=6)
+    frame = make_frame(1)
+    cache.put(cache.key_for(frame, 'Blur faces!'), ['face'])
+
+    noisy = np.clip(frame.astype(int) + 2, 0, 255).astype(np.uint8)
+    assert cache.get(cache.key_for(noisy, 'blur   faces')) == ['face']
+    assert cache.get(cache.key_for(make_frame(2), 'blur faces')) is None
+
+    stats = cache.get_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+
+def test_lru_eviction_and_ttl():
+    """Cache stays bounded and expires old entries"""
+    cache = DetectionCache(max_entries=2, ttl=60.0, max_distance=0)
+    keys = [cache.key_for(make_frame(i), 'faces') for i in range(3)]
+    for key in keys:
+        cache.put(key, [])
+    assert len(cache) == 2
+    assert cache.get_stats()['evictions'] == 1
+    assert cache.get(keys[0]) is None
+
+    cache.ttl = 0.0
+    assert cache.get(keys[2]) is None
+    assert cache.get_stats()['expirations'] == 2
+
+def test_hash_and_prompt_normalization():
+    frame = make_frame(3)
+    assert perceptual_hash(frame) == perceptual_hash(frame.copy())
+    assert perceptual_hash(frame) < 2 ** 64
+    assert normalize_prompt('  Detect, and BLUR faces. ') == 'detect and blur faces'
+
+def gradient_frame():
+    row = np.linspace(40, 200, 640).astype(np.uint8)
+    return np.repeat(np.tile(row, (480, 1))[:, :, None], 3, axis=2)
+
+def test_frame_with_added_object_misses():
+    """A subject appearing in front of a static background is not a near-duplicate at the default tolerance"""
+    cache = DetectionCache()
+    frame = gradient_frame()
+    cache.put(cache.key_for(frame, 'blur faces'), [])
+    with_object = frame.copy()
+    with_object[200:300, 300:400] = 255
+    assert cache.get(cache.key_for(with_object, 'blur faces')) is None
+
+def test_motion_triggered_detection_bypasses_cache(monkeypatch):
+    """A re-detection caused by a new object calls Gemini even when the frame hash is unchanged"""
+    from pimoroni_bot.gemini_vision_blur_system import GeminiVisionBlur
+    system = GeminiVisionBlur()
+    monkeypatch.setattr(system.api_guard, 'available', lambda: True)
+    fresh = [{'bbox': (300, 200, 40, 40), 'type': 'face', 'confidence': 0.9}]
+    monkeypatch.setattr(system, 'call_gemini_analysis', lambda frame, prompt, on_partial=None: fresh)
+
+    frame = gradient_frame()
+    system.detection_cache.put(system.detection_cache.key_for(frame, 'blur faces'), [])
+    with_face = frame.copy()
+    with_face[200:240, 300:340] = 255  # flips a single hash bit
+    assert hamming_distance(perceptual_hash(with_face), perceptual_hash(frame)) <= system.detection_cache.max_distance
+    assert system.analyze_frame(with_face, 'blur faces') == ([], False)
+    assert system.analyze_frame(with_face, 'blur faces', use_cache=False) == (fresh, True)
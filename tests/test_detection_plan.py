@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import time
+
+import numpy as np
+
+from pimoroni_bot.robot_enhanced_blur import RobotEnhancedBlur
+
+def test_plan_is_deduplicated_and_cached():
+    """Repeated detection types compile into one step each, colours into one step, once per prompt"""
+    robot = RobotEnhancedBlur()
+    robot.parse_prompt = lambda prompt: ['faces', 'color_red', 'bodies', 'faces', 'color_blue', 'color_red']
+    plan = robot.compile_prompt("blur the person's face in red and blue")
+    assert [step['name'] for step in plan['steps']] == ['faces', 'colors', 'bodies']
+    assert plan['steps'][1]['colors'] == ('red', 'blue')
+    assert robot.compile_prompt("blur the person's face in red and blue") is plan
+    assert RobotEnhancedBlur().compile_prompt("hide everything sensitive, faces too")['steps'] == []
+
+def test_plan_order_follows_measured_costs():
+    """The cached plan is re-ordered and re-estimated from costs measured after it was compiled"""
+    robot = RobotEnhancedBlur()
+    plan = robot.compile_prompt("blur faces and signs")
+    before = robot.describe_plan(plan)
+    assert [step['name'] for step in before['steps']] == ['text', 'faces']  # 10 ms vs 15 ms budgets
+    robot.detector_costs = {'faces': 2.0, 'text': 30.0}
+    after = robot.describe_plan(robot.compile_prompt("blur faces and signs"))
+    assert [step['name'] for step in after['steps']] == ['faces', 'text']
+    assert after['estimated_ms'] == 2.0 + 30.0 / 3
+    assert after['estimated_ms'] != before['estimated_ms']
+
+def test_faces_inside_bodies_not_reported_twice():
+    """'person' runs faces and bodies; a face inside a body box is dropped, one outside is kept"""
+    robot = RobotEnhancedBlur()
+    robot.detection_budget_ms = 1000.0
+    boxes = {'faces': [(30, 10, 20, 20), (120, 10, 20, 20)], 'bodies': [(20, 0, 40, 100)]}
+    robot.run_detector = lambda step, frame, features: boxes[step['name']]
+    plan = robot.compile_prompt("blur every person")
+    assert [step['name'] for step in plan['steps']] == ['faces', 'bodies']
+    regions, _ = robot.detect_regions(np.zeros((120, 160, 3), dtype=np.uint8), plan)
+    assert regions == [('faces', (120, 10, 20, 20)), ('bodies', (20, 0, 40, 100))]
+
+def test_slow_cadence_reuses_boxes():
+    """Steps with every=N only run on every Nth detection pass"""
+    robot = RobotEnhancedBlur()
+    robot.detection_budget_ms = 1000.0
+    calls = []
+    robot.run_detector = lambda step, frame, features: calls.append(step['name']) or [(10 * len(calls), 0, 10, 10)]
+    plan = robot.compile_prompt("blur faces and bodies")
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    for _ in range(3):
+        regions, _ = robot.detect_regions(frame, plan)
+        assert len(regions) == 2
+    assert calls.count('faces') == 3
+    assert calls.count('bodies') == 1
+
+def test_budget_defers_expensive_steps():
+    """Once the frame budget is spent, remaining due steps wait and reuse their boxes"""
+    robot = RobotEnhancedBlur()
+    robot.detection_budget_ms = 5.0
+    robot.detector_costs = {'faces': 4.0, 'text': 4.0}
+    calls = []
+
+    def run_detector(step, frame, features):
+        calls.append(step['name'])
+        time.sleep(0.004)
+        return [(0, 0, 10, 10)]
+    robot.run_detector = run_detector
+    plan = robot.compile_prompt("blur faces and text")
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    regions, _ = robot.detect_regions(frame, plan)
+    assert calls == ['faces'] and len(regions) == 1
+    regions, _ = robot.detect_regions(frame, plan)
+    assert calls == ['faces', 'text'] and len(regions) == 2
+    assert robot.scheduler_stats['text']['deferred'] == 1
+    assert robot.scheduler_stats['faces']['reused'] == 1
+
+def test_parallel_merge_matches_sequential_order():
+    """Parallel detection merges boxes in plan order whatever order the threads finish in"""
+    def run_detector(step, frame, features):
+        time.sleep(0.02 if step['name'] == 'faces' else 0.0)
+        return [(len(step['name']), 0, 10, 10)]
+
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    results = []
+    for workers in (1, 3):
+        robot = RobotEnhancedBlur()
+        robot.detection_budget_ms = 1000.0
+        robot.enable_parallel(workers)
+        robot.run_detector = run_detector
+        results.append(robot.detect_regions(frame, robot.compile_prompt("blur faces, eyes and text")))
+        robot.disable_parallel()
+    assert results[0] == results[1]
+    assert len(results[1][0]) == 3
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+import numpy as np
+
+from pimoroni_bot.detection_worker import DetectionWorker
+
+def frame(value=0):
+    return np.full((48, 64, 3), value, dtype=np.uint8)
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return False
+
+class BlockingDetector:
+    """detect_fn that holds each call until released and records the frames it saw"""
+
+    def __init__(self, fail=False):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.seen = []
+        self.fail = fail
+
+    def __call__(self, frame, prompt, on_partial=None):
+        self.seen.append(int(frame[0, 0, 0]))
+        self.started.set()
+        self.release.wait(2.0)
+        self.release.clear()
+        if self.fail:
+            raise RuntimeError("API down")
+        return [{'bbox': (0, 0, 10, 10), 'frame': int(frame[0, 0, 0])}]
+
+def test_inbox_keeps_only_newest_frame():
+    """Frames submitted while busy replace each other; only the newest is detected"""
+    detector = BlockingDetector()
+    worker = DetectionWorker(detector)
+    worker.start()
+    try:
+        assert worker.is_idle()
+        worker.submit(frame(1), 'faces')
+        assert detector.started.wait(2.0)
+        assert not worker.is_idle()
+        worker.submit(frame(2), 'faces')
+        worker.submit(frame(3), 'faces')
+        assert worker.get_stats()['dropped'] == 1
+
+        detector.release.set()
+        assert wait_for(lambda: detector.seen == [1, 3])
+        detector.release.set()
+        assert wait_for(worker.is_idle)
+        assert worker.get_result()['detections'][0]['frame'] == 3
+        assert worker.get_stats()['completed'] == 2
+    finally:
+        detector.release.set()
+        worker.stop()
+
+def test_partial_results_published_before_final():
+    """A streaming detector's partial detections are visible while it is still running"""
+    release = threading.Event()
+
+    def detect(frame, prompt, on_partial):
+        on_partial([{'bbox': (1, 1, 5, 5)}])
+        release.wait(2.0)
+        return [{'bbox': (1, 1, 5, 5)}, {'bbox': (20, 20, 5, 5)}]
+
+    worker = DetectionWorker(detect, partial_results=True)
+    worker.start()
+    try:
+        worker.submit(frame(), 'faces')
+        assert wait_for(lambda: worker.get_result() is not None)
+        partial = worker.get_result()
+        assert partial['partial'] and len(partial['detections']) == 1
+        assert not worker.is_idle()
+
+        release.set()
+        assert wait_for(lambda: not worker.get_result()['partial'])
+        assert len(worker.get_result()['detections']) == 2
+        assert worker.get_result()['seq'] == partial['seq'] + 1
+        assert worker.get_stats()['avg_first_result_latency'] is not None
+    finally:
+        release.set()
+        worker.stop()
+
+def test_failure_keeps_last_good_result():
+    """A failing detection is counted, leaves the previous result in place and frees the worker"""
+    detector = BlockingDetector()
+    worker = DetectionWorker(detector)
+    worker.start()
+    try:
+        worker.submit(frame(1), 'faces')
+        detector.release.set()
+        assert wait_for(lambda: worker.get_result() is not None and worker.is_idle())
+        good = worker.get_result()
+
+        detector.fail = True
+        worker.submit(frame(2), 'faces')
+        detector.release.set()
+        assert wait_for(lambda: worker.get_stats()['failed'] == 1)
+        assert wait_for(worker.is_idle)
+        assert worker.get_result() is good
+    finally:
+        detector.release.set()
+        worker.stop()
+
+def test_process_frame_async_reuses_boxes_while_worker_is_busy(monkeypatch):
+    """The render path never waits for Gemini: it blurs with the last result while a new one runs"""
+    from pimoroni_bot.gemini_vision_blur_system import GeminiVisionBlur
+    from pimoroni_bot.motion import notify_robot_motion
+
+    system = GeminiVisionBlur()
+    monkeypatch.setattr(system.http_client, 'start_warm_up', lambda url: None)
+    release = threading.Event()
+    calls = []
+
+    def analyze_frame(frame, prompt, on_partial=None, use_cache=True):
+        calls.append(use_cache)
+        release.wait(2.0)
+        release.clear()
+        return [{'bbox': (40, 40, 60, 60), 'type': 'face', 'confidence': 0.9}], True
+    monkeypatch.setattr(system, 'analyze_frame', analyze_frame)
+
+    scene = np.random.RandomState(0).randint(0, 255, (240, 320, 3), dtype=np.uint8)
+    changed = lambda output: np.any(output[40:100, 40:100] != scene[40:100, 40:100])
+    try:
+        output, _ = system.process_frame_async(scene, 'blur faces')
+        assert wait_for(lambda: len(calls) == 1)
+        assert not changed(output)  # nothing detected yet
+
+        release.set()
+        assert wait_for(lambda: system.detection_worker.get_result() is not None)
+        output, _ = system.process_frame_async(scene, 'blur faces')
+        assert changed(output)
+
+        # Driving forces a refresh; the new detection blocks but the frame comes back at once
+        notify_robot_motion('forward')
+        system.last_analysis_frame = -1000
+        start = time.time()
+        output, _ = system.process_frame_async(scene, 'blur faces')
+        assert time.time() - start < 0.5
+        assert wait_for(lambda: len(calls) == 2)
+        assert not system.detection_worker.is_idle()
+        assert changed(output)
+    finally:
+        notify_robot_motion('stop', settle_time=0.0)
+        release.set()
+        system.stop_detection_worker()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+import threading
+
+import cv2
+import numpy as np
+
+from pimoroni_bot.detectors import DetectorRegistry
+
+def drawn_face(size):
+    """A synthetic frontal face (oval, brows, eyes, nose, mouth) scaled to size x size"""
+    face = np.full((200, 200), 40, dtype=np.uint8)
+    cv2.ellipse(face, (100, 105), (70, 90), 0, 0, 360, 190, -1)
+    for x in (70, 130):
+        cv2.ellipse(face, (x, 85), (16, 8), 0, 0, 360, 50, -1)
+        cv2.line(face, (x - 20, 62), (x + 18, 62), 60, 6)
+    cv2.ellipse(face, (100, 120), (8, 18), 0, 0, 360, 150, -1)
+    cv2.ellipse(face, (100, 155), (25, 7), 0, 0, 360, 70, -1)
+    face = cv2.GaussianBlur(face, (9, 9), 0)
+    return cv2.resize(face, (size, size), interpolation=cv2.INTER_AREA)
+
+def test_small_face_found_at_default_width():
+    """A 28 px face in a 640x480 frame, which a full-resolution pass finds, is still detected"""
+    gray = np.full((480, 640), 90, dtype=np.uint8)
+    gray[200:228, 300:328] = drawn_face(28)
+    registry = DetectorRegistry()
+    assert registry.detection_scale('face', gray.shape, 320) == 1.0
+    boxes = registry.detect('face', gray, 320)
+    assert len(boxes) == 1
+    x, y, w, h = boxes[0]
+    assert x <= 300 and y <= 200 and x + w >= 326 and y + h >= 226
+
+def test_detection_width_applies_above_the_size_floor():
+    """Bodies are expected large enough to run at the requested width"""
+    registry = DetectorRegistry()
+    assert registry.detection_scale('body', (480, 640), 240) == 240 / 640.0
+
+def test_load_records_stay_bounded_across_threads():
+    """Every new thread loads its own cascade; totals keep counting but the record list is capped"""
+    registry = DetectorRegistry(history=3)
+    for _ in range(5):
+        thread = threading.Thread(target=registry.get, args=('eye',))
+        thread.start()
+        thread.join()
+    assert len(registry.loads) == 3
+    assert registry.get_stats()['loads']['eye']['loads'] == 5
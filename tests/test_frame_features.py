@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from pimoroni_bot.frame_features import FrameFeatures
+
+def test_each_feature_computed_once():
+    """Repeated reads of gray, HSV, edges and a pyramid level reuse the first result"""
+    frame = np.random.RandomState(0).randint(0, 255, (240, 320, 3), dtype=np.uint8)
+    features = FrameFeatures(frame)
+    assert features.edges is features.edges
+    assert features.hsv is features.hsv
+    assert features.gray_at(160) is features.gray_at(160)
+    assert features.gray_at(160).shape == (120, 160)
+    assert features.gray_at(640) is features.gray
+    assert sorted(features.timings) == ['edges', 'gray', 'gray@160', 'hsv']
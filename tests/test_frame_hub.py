@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+import numpy as np
+
+from pimoroni_bot.frame_hub import FrameHub, ProcessingThread
+
+def test_latest_frame_wins():
+    """A slow consumer only sees the newest frame"""
+    hub = FrameHub()
+    for i in range(5):
+        hub.publish(np.full((2, 2), i, dtype=np.uint8))
+
+    seq, frame = hub.wait_for_frame(0, timeout=0.1)
+    assert seq == 5
+    assert frame[0, 0] == 4
+
+    # Nothing newer yet
+    seq, frame = hub.wait_for_frame(seq, timeout=0.05)
+    assert frame is None
+
+def test_every_subscriber_sees_each_frame():
+    """Frames are broadcast, not split between consumers"""
+    hub = FrameHub()
+    received = {0: [], 1: [], 2: []}
+    ready = threading.Barrier(4)
+
+    def consume(idx):
+        last_seq = 0
+        ready.wait()
+        while last_seq < 3:
+            last_seq, frame = hub.wait_for_frame(last_seq, timeout=1.0)
+            if frame is not None:
+                received[idx].append(last_seq)
+
+    threads = [threading.Thread(target=consume, args=(i,)) for i in received]
+    for t in threads:
+        t.start()
+    ready.wait()
+    for i in range(3):
+        hub.publish(np.zeros((2, 2), dtype=np.uint8))
+    for t in threads:
+        t.join(timeout=2.0)
+
+    for seqs in received.values():
+        assert seqs[-1] == 3
+
+def test_subscriber_count():
+    """Subscriber count tracks live generators"""
+    hub = FrameHub()
+    hub.publish(np.zeros((2, 2), dtype=np.uint8))
+    gen = hub.subscribe(timeout=0.05)
+    assert next(gen)[0] == 1
+    assert hub.get_stats()['subscribers'] == 1
+    gen.close()
+    assert hub.get_stats()['subscribers'] == 0
+
+def test_processing_runs_once_per_frame():
+    """Blur/encode cost does not grow with the number of viewers"""
+    source = FrameHub('capture')
+    output = FrameHub('stream')
+    calls = []
+
+    def process(frame):
+        calls.append(1)
+        return frame
+
+    worker = ProcessingThread(source, output, process)
+    viewers = [output.subscribe(timeout=0.05) for _ in range(3)]
+    results = [[] for _ in viewers]
+
+    def watch(idx):
+        for seq, chunk in viewers[idx]:
+            results[idx].append(chunk)
+            if len(results[idx]) == 1:
+                break
+
+    threads = [threading.Thread(target=watch, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    worker.start()
+    while output.subscribers < 3:
+        time.sleep(0.01)
+    source.publish(np.zeros((8, 8, 3), dtype=np.uint8))
+    for t in threads:
+        t.join(timeout=2.0)
+    worker.stop()
+
+    assert len(calls) == 1
+    assert all(r and r[0] is results[0][0] for r in results)
+    assert results[0][0].startswith(b'--frame\r\n')
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+import json
+
+import numpy as np
+import pytest
+
+from pimoroni_bot.gemini_vision_blur_system import GeminiVisionBlur
+
+def gemini_body(document):
+    """A generateContent response whose text part is the given JSON document"""
+    return {'candidates': [{'content': {'parts': [{'text': json.dumps(document)}]}}]}
+
+@pytest.fixture
+def system():
+    system = GeminiVisionBlur()
+    system.api_key = 'test-key'
+    system.response_store = None
+    return system
+
+def frames():
+    """Two frames of different sizes, so boxes must be scaled per frame"""
+    return [np.zeros((480, 640, 3), dtype=np.uint8), np.zeros((240, 320, 3), dtype=np.uint8)]
+
+def test_batch_rows_split_back_to_each_frame(system, monkeypatch):
+    """One request carries every frame; each list of rows maps to its own frame size"""
+    sent = []
+
+    def post(payload):
+        sent.append(payload)
+        return gemini_body([
+            [[100, 100, 500, 500, 0, 90]],
+            [[0, 0, 1000, 1000, 2, 80], [500, 500, 600, 700, 1, 70]]
+        ])
+    monkeypatch.setattr(system, 'post_generate_content', post)
+
+    per_frame = system.call_gemini_batch(frames(), 'blur faces and documents')
+    assert len(sent) == 1
+    images = [part for part in sent[0]['contents'][0]['parts'] if 'inline_data' in part]
+    assert len(images) == 2
+
+    assert [d['bbox'] for d in per_frame[0]] == [(64, 48, 256, 192)]
+    assert per_frame[0][0]['type'] == 'face'
+    assert [d['bbox'] for d in per_frame[1]] == [(0, 0, 320, 240), (160, 120, 64, 24)]
+    assert [d['type'] for d in per_frame[1]] == ['document', 'id']
+
+def test_indexed_layout_follows_index_not_position(system, monkeypatch):
+    """Unstructured responses are keyed by their image index; unknown indices are dropped"""
+    system.structured_output = False
+    document = {'images': [
+        {'index': 1, 'detections': [{'bbox': [10, 20, 30, 40], 'type': 'face', 'confidence': 0.9}]},
+        {'index': 7, 'detections': [{'bbox': [1, 1, 1, 1], 'type': 'face', 'confidence': 0.9}]},
+        {'index': 0, 'detections': []}
+    ]}
+    monkeypatch.setattr(system, 'post_generate_content', lambda payload: gemini_body(document))
+
+    per_frame = system.call_gemini_batch(frames(), 'blur faces')
+    assert per_frame[0] == []
+    assert [d['bbox'] for d in per_frame[1]] == [(10, 20, 30, 40)]
+
+def test_failed_batch_gives_empty_list_per_frame(system, monkeypatch):
+    """A failed request still returns one (empty) result per frame"""
+    monkeypatch.setattr(system, 'post_generate_content', lambda payload: None)
+    assert system.call_gemini_batch(frames(), 'blur faces') == [[], []]
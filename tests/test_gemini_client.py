@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+import socket
+
+import pytest
+
+from pimoroni_bot import gemini_client
+from pimoroni_bot.gemini_client import _TimedHTTPSConnection
+
+@pytest.fixture
+def listener():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    yield server.getsockname()[1]
+    server.close()
+
+def test_new_conn_falls_back_to_next_address(monkeypatch, listener):
+    """A host whose first address refuses still connects through the next one, timing the attempt"""
+    real_getaddrinfo = socket.getaddrinfo
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host != 'multi.test':
+            return real_getaddrinfo(host, port, *args, **kwargs)
+        # Nothing listens on 127.0.0.2, so the first address is refused
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.2', port)),
+                (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', port))]
+
+    monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+    connection = _TimedHTTPSConnection('multi.test', listener, timeout=2)
+    gemini_client._phase.timings = {}
+    try:
+        sock = connection._new_conn()
+        assert sock.getpeername() == ('127.0.0.1', listener)
+        sock.close()
+        assert gemini_client._phase.timings['connect'] > 0
+        assert connection.host == 'multi.test'
+    finally:
+        gemini_client._phase.timings = None
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+from pimoroni_bot.json_stream import IncrementalObjectParser
+
+def feed_in_chunks(parser, text, size):
+    """Feed text a few characters at a time, returns everything emitted in order"""
+    emitted = []
+    for i in range(0, len(text), size):
+        emitted.extend(parser.feed(text[i:i + size]))
+    return emitted
+
+def test_objects_emitted_as_they_close_across_chunks():
+    """Detections inside a fenced wrapper come out one by one, whatever the chunk size"""
+    text = ('```json\n{"detections": [{"label": "face", "bbox": [1, 2, 3, 4]}, '
+            '{"label": "sign {left}", "bbox": [5, 6, 7, 8]}]}\n```')
+    for size in (1, 3, 7, len(text)):
+        parser = IncrementalObjectParser(lambda obj: 'bbox' in obj)
+        emitted = feed_in_chunks(parser, text, size)
+        assert [obj['label'] for obj in emitted] == ['face', 'sign {left}']
+        assert parser.emitted == 2
+
+def test_object_emitted_by_the_chunk_that_closes_it():
+    """Nothing comes out until the closing brace arrives"""
+    parser = IncrementalObjectParser(lambda obj: 'bbox' in obj)
+    assert parser.feed('[{"bbox": [1, 2, 3, 4], "label": "fa') == []
+    assert parser.feed('ce"}') == [{'bbox': [1, 2, 3, 4], 'label': 'face'}]
+
+def test_escapes_split_between_chunks():
+    """An escaped quote or backslash cut between chunks does not end the string early"""
+    parser = IncrementalObjectParser()
+    text = '{"label": "say \\"}\\" and \\\\", "bbox": [0, 0, 1, 1]}'
+    emitted = []
+    for chunk in ('{"label": "say \\', '"}\\', '" and \\', '\\", "bbox": [0, 0, 1, 1]}'):
+        emitted.extend(parser.feed(chunk))
+    assert parser.text == text
+    assert emitted == [{'label': 'say "}" and \\', 'bbox': [0, 0, 1, 1]}]
+
+def test_nested_objects_inner_first():
+    """Nested objects close inner first; without a predicate the wrapper is emitted last"""
+    parser = IncrementalObjectParser()
+    emitted = feed_in_chunks(parser, '{"a": {"b": {"c": 1}}, "d": [2]}', 4)
+    assert emitted == [{'c': 1}, {'b': {'c': 1}}, {'a': {'b': {'c': 1}}, 'd': [2]}]
+
+def test_arrays_offered_only_when_enabled():
+    """Compact rows are emitted as lists with arrays=True and skipped otherwise"""
+    text = '[[100, 200, 300, 400, 0], [10, 20, 30, 40, 1]]'
+    rows = IncrementalObjectParser(lambda row: len(row) == 5, arrays=True)
+    assert feed_in_chunks(rows, text, 5) == [[100, 200, 300, 400, 0], [10, 20, 30, 40, 1]]
+    assert feed_in_chunks(IncrementalObjectParser(), text, 5) == []
+
+def test_truncated_stream_keeps_closed_objects_only():
+    """A stream cut mid-object yields the objects that closed before the cut"""
+    parser = IncrementalObjectParser(lambda obj: 'bbox' in obj)
+    emitted = feed_in_chunks(parser, '{"detections": [{"bbox": [1, 2, 3, 4]}, {"bbox": [5, 6', 6)
+    assert emitted == [{'bbox': [1, 2, 3, 4]}]
+    assert parser.emitted == 1
+    assert len(parser.open_objects) == 4  # wrapper, list, cut-off detection and its bbox
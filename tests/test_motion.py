@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+
+from pimoroni_bot.motion import MotionGate, notify_robot_motion
+
+@pytest.fixture(autouse=True)
+def robot_still():
+    """Robot motion is process-wide; start and end every test with the robot stopped"""
+    notify_robot_motion('stop', settle_time=0.0)
+    yield
+    notify_robot_motion('stop', settle_time=0.0)
+
+def scene():
+    """Coarse random blocks, so changes survive the gate's downscaled, blurred thumbnail"""
+    blocks = np.random.RandomState(0).randint(0, 128, (12, 16, 3), dtype=np.uint8)
+    return np.ascontiguousarray(np.repeat(np.repeat(blocks, 20, axis=0), 20, axis=1))
+
+def primed_gate(frame, **kwargs):
+    gate = MotionGate('test', **kwargs)
+    assert gate.check(frame) == (True, 'first_frame')
+    gate.mark_detected(frame)
+    return gate
+
+def test_static_scene_is_skipped():
+    """An unchanged frame reuses the last detection"""
+    frame = scene()
+    gate = primed_gate(frame)
+    for _ in range(5):
+        assert gate.check(frame.copy()) == (False, None)
+    assert gate.get_stats()['skipped'] == 5
+
+def test_moving_object_triggers_with_its_region():
+    """A bright patch appearing triggers a refresh, and changed_regions boxes it"""
+    frame = scene()
+    gate = primed_gate(frame)
+    moved = frame.copy()
+    moved[100:140, 200:260] = 255
+    should_detect, reason = gate.check(moved)
+    assert should_detect and reason == 'scene_changed'
+    regions = gate.changed_regions(moved.shape)
+    assert len(regions) == 1
+    x, y, w, h = regions[0]
+    assert x <= 200 and y <= 100 and x + w >= 260 and y + h >= 140
+
+def test_large_motion_triggers_at_once():
+    """Most of the frame changing between two frames is reported as large motion"""
+    frame = scene()
+    gate = primed_gate(frame)
+    assert gate.check(frame + 100) == (True, 'large_motion')
+
+def test_robot_motion_forces_refresh():
+    """A motor command triggers even a static scene until the robot stops and settles"""
+    frame = scene()
+    gate = primed_gate(frame)
+    notify_robot_motion('forward')
+    assert gate.check(frame) == (True, 'robot_motion')
+    notify_robot_motion('stop', settle_time=0.0)
+    assert gate.check(frame) == (False, None)
+
+def test_idle_scene_refreshed_eventually():
+    """A static scene is re-detected after max_idle_frames"""
+    frame = scene()
+    gate = primed_gate(frame, max_idle_frames=3)
+    assert gate.check(frame) == (False, None)
+    assert gate.check(frame) == (False, None)
+    assert gate.check(frame) == (True, 'max_idle')
+
+def test_small_new_object_triggers():
+    """A face-sized object appearing in a static scene fires the gate although the changed fraction is tiny"""
+    frame = scene()
+    gate = primed_gate(frame)
+    with_object = frame.copy()
+    with_object[100:124, 150:174] = 255  # 24 px, below change_fraction on its own
+    assert gate.check(with_object) == (True, 'new_object')
+    assert gate.last_change < gate.change_fraction
+
+def test_change_smaller_than_any_subject_is_skipped():
+    """A few changed pixels, smaller than the smallest subject, do not fire the gate"""
+    frame = scene()
+    gate = primed_gate(frame)
+    speck = frame.copy()
+    speck[100:106, 150:156] = 255
+    assert gate.check(speck) == (False, None)
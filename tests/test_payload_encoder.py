@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from pimoroni_bot.payload_encoder import PayloadEncoder
+
+def scene(seed):
+    """A camera-like frame: smooth gradient with some texture, so it compresses realistically"""
+    rng = np.random.RandomState(seed)
+    ramp = np.linspace(0, 255, 1280, dtype=np.float32)
+    frame = np.tile(ramp, (720, 1)).astype(np.uint8)[:, :, None].repeat(3, axis=2)
+    noise = rng.randint(0, 40, (90, 160, 3), dtype=np.uint8)
+    return frame + np.kron(noise, np.ones((8, 8, 1), dtype=np.uint8))
+
+def simulate(server_time, bits_per_second, requests=12):
+    """Encode frames and report request time = inference + upload at the given link speed"""
+    encoder = PayloadEncoder()
+    for i in range(requests):
+        encoded = encoder.encode(scene(i))
+        jitter = 0.05 * ((i * 7) % 5) / 5.0
+        encoder.record_request(encoded['bytes'], server_time + jitter + encoded['bytes'] * 8.0 / bits_per_second)
+    encoder.encode(scene(requests))
+    return encoder
+
+def test_fast_link_with_slow_inference_keeps_quality():
+    """Slow model inference on a 10 Mbit/s uplink does not push uploads to the lowest level"""
+    encoder = simulate(server_time=2.5, bits_per_second=10e6)
+    assert encoder.bandwidth > 0.5e6
+    assert encoder.level >= encoder.default_level
+    assert abs(encoder.server_time - 2.5) < 0.2
+
+def test_slow_link_drops_to_lowest_level():
+    """A 100 kbit/s uplink is measured as such and gets the smallest payload"""
+    encoder = simulate(server_time=1.0, bits_per_second=100e3)
+    assert 8e3 < encoder.bandwidth < 20e3
+    assert encoder.level == 0
+
+def test_failed_requests_do_not_escalate_quality(monkeypatch):
+    """A failed Gemini call leaves the escalation alone; an answered empty one raises it"""
+    from pimoroni_bot.gemini_vision_blur_system import GeminiVisionBlur
+    system = GeminiVisionBlur()
+    system.api_key = 'test-key'
+    system.response_store = None
+    monkeypatch.setattr(system.api_guard, 'available', lambda: True)
+    frame = scene(0)
+
+    monkeypatch.setattr(system, 'post_generate_content', lambda payload: None)
+    system.analyze_frame(frame, 'blur faces', use_cache=False)
+    system.analyze_frames([frame, scene(1)], 'blur faces')
+    assert system.payload_encoder.escalation == 0
+
+    empty = {'candidates': [{'content': {'parts': [{'text': '[]'}]}}]}
+    monkeypatch.setattr(system, 'post_generate_content', lambda payload: empty)
+    system.analyze_frame(frame, 'blur faces', use_cache=False)
+    assert system.payload_encoder.escalation == 1
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+
+from pimoroni_bot.rate_limit import ApiGuard, parse_retry_after
+
+def test_breaker_opens_and_probes_once():
+    """Consecutive failures open the breaker; after the cool-down one probe is let through"""
+    guard = ApiGuard('test', rate=100.0, capacity=100, failure_threshold=2, reset_timeout=30.0)
+    for _ in range(2):
+        assert guard.acquire() == (True, None)
+        guard.record_result(503)
+    assert guard.acquire() == (False, 'circuit_open')
+    assert guard.get_stats()['state'] == 'open'
+
+    guard.breaker.open_until = 0.0
+    assert guard.acquire() == (True, None)
+    assert guard.acquire() == (False, 'circuit_open')  # probe still in flight
+    guard.record_result(200)
+    assert guard.get_stats()['state'] == 'closed'
+
+def test_retry_after_blocks_bucket():
+    """A 429 with Retry-After pauses requests even below the failure threshold"""
+    guard = ApiGuard('test', rate=100.0, capacity=100, failure_threshold=5)
+    assert guard.acquire()[0]
+    guard.record_result(429, retry_after='20')
+    assert not guard.available()
+    assert guard.get_stats()['retry_after_remaining'] > 19
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after(None) is None
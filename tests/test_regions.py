@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+
+from pimoroni_bot.regions import consolidate_boxes, suppress
+
+def test_nested_and_duplicate_boxes_collapse():
+    """Boxes inside a larger box are dropped, near-duplicates merge"""
+    boxes = [(10, 10, 100, 100), (20, 20, 30, 30), (12, 11, 98, 99), (300, 300, 20, 20)]
+    assert len(suppress(boxes)) == 2
+    assert consolidate_boxes(boxes) == [(10, 10, 100, 100), (300, 300, 20, 20)]
+
+def test_overlapping_boxes_union_only_when_cheap():
+    """Heavily overlapping boxes merge into their union, barely touching ones stay apart"""
+    assert consolidate_boxes([(0, 0, 100, 20), (10, 2, 100, 20)]) == [(0, 0, 110, 22)]
+    assert len(consolidate_boxes([(0, 0, 100, 100), (95, 95, 100, 100)])) == 2
+    assert consolidate_boxes([]) == []
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+import itertools
+
+import pytest
+
+from pimoroni_bot import response_store
+from pimoroni_bot.response_store import ReplayMiss, ResponseStore, request_key
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing time.time() so last-used order never ties"""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(response_store.time, 'time', lambda: float(next(ticks)))
+
+def test_put_get_round_trip(tmp_path, clock):
+    """Stored values come back intact; unknown keys miss"""
+    store = ResponseStore(str(tmp_path / 'store.db'))
+    detections = [{'label': 'face', 'bbox': [1, 2, 3, 4], 'confidence': 0.9}]
+    store.put('a', detections)
+    assert store.get('a') == detections
+    assert store.get('b') is None
+    stats = store.get_stats()
+    assert (stats['entries'], stats['hits'], stats['misses'], stats['writes']) == (1, 1, 1, 1)
+    store.close()
+
+def test_request_key_depends_on_payload_and_model():
+    """Identical requests share a key; a different image or model does not"""
+    payload = {'contents': [{'parts': [{'text': 'blur faces'}, {'inline_data': {'data': 'abc'}}]}]}
+    same = {'contents': [{'parts': [{'text': 'blur faces'}, {'inline_data': {'data': 'abc'}}]}]}
+    other = {'contents': [{'parts': [{'text': 'blur faces'}, {'inline_data': {'data': 'abd'}}]}]}
+    assert request_key(payload, 'flash') == request_key(same, 'flash')
+    assert request_key(payload, 'flash') != request_key(other, 'flash')
+    assert request_key(payload, 'flash') != request_key(payload, 'pro')
+
+def test_least_recently_used_evicted_at_size_bound(tmp_path, clock):
+    """Going over max_bytes drops the entry read longest ago, not the oldest written"""
+    value = ['x' * 90]  # 96 bytes as JSON
+    store = ResponseStore(str(tmp_path / 'store.db'), max_bytes=300)
+    for key in ('a', 'b', 'c'):
+        store.put(key, value)
+    assert store.get('a') == value  # 'b' is now the least recently used
+    store.put('d', value)
+    assert store.get('b') is None
+    assert all(store.get(key) == value for key in ('a', 'c', 'd'))
+    stats = store.get_stats()
+    assert stats['evictions'] == 1
+    assert stats['bytes'] <= 300
+    store.close()
+
+def test_replay_only_raises_on_miss(tmp_path):
+    """Replay-only serves what was stored, raises ReplayMiss otherwise and never writes"""
+    path = str(tmp_path / 'store.db')
+    recorder = ResponseStore(path)
+    recorder.put('known', [])
+    recorder.close()
+
+    replay = ResponseStore(path, replay_only=True)
+    assert replay.get('known') == []
+    with pytest.raises(ReplayMiss):
+        replay.get('unknown')
+    replay.put('unknown', [{'label': 'face'}])
+    with pytest.raises(ReplayMiss):
+        replay.get('unknown')
+    assert replay.get_stats()['writes'] == 0
+    replay.close()
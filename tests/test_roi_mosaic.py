@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from pimoroni_bot.roi_mosaic import RoiMosaic, propose_regions
+
+def test_overlapping_boxes_merge_and_map_back():
+    """Boxes found inside a mosaic tile land on the same pixels of the frame"""
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    frame[100:140, 100:140] = 255
+    regions = propose_regions(frame.shape, [(100, 100, 40, 40), (120, 120, 40, 40), (900, 500, 200, 150)])
+    assert len(regions) == 2
+
+    mosaic = RoiMosaic(frame, regions, width=480)
+    assert mosaic.image.shape[1] <= 480
+
+    tile = next(t for t in mosaic.tiles if t['region'][0] < 640)
+    ox, oy = tile['offset']
+    rx, ry = tile['region'][:2]
+    box = (ox + 100 - rx, oy + 100 - ry, 40, 40)
+    assert np.all(mosaic.image[box[1]:box[1] + 40, box[0]:box[0] + 40] == 255)
+    assert mosaic.map_detections([{'bbox': box, 'type': 'face'}])[0]['bbox'] == (100, 100, 40, 40)
+
+def test_large_coverage_sends_whole_frame():
+    """Cropping is skipped when candidates cover most of the frame"""
+    assert propose_regions((480, 640, 3), [(0, 0, 600, 400)]) is None
+    assert propose_regions((480, 640, 3), []) is None
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import json
+
+import numpy as np
+import pytest
+
+from pimoroni_bot.gemini_vision_blur_system import GeminiVisionBlur
+
+@pytest.fixture
+def system():
+    system = GeminiVisionBlur()
+    system.api_key = 'test-key'
+    system.response_store = None
+    return system
+
+def test_compact_row_scaled_to_frame(system):
+    """Rows normalized to 0-1000 map to pixels of the frame, independent of the upload size"""
+    detection = system.parse_compact_row([250, 100, 750, 400, 0, 87], (480, 640, 3))
+    assert detection == {'bbox': (64, 120, 192, 240), 'type': 'face', 'confidence': 0.87}
+    # Out-of-range coordinates, type codes and confidences are clamped
+    clamped = system.parse_compact_row([0, 0, 1200, 1000, 9, 150], (480, 640))
+    assert clamped == {'bbox': (0, 0, 640, 480), 'type': 'sensitive', 'confidence': 1.0}
+
+def test_bad_rows_are_skipped(system):
+    """Truncated, non-numeric and empty boxes are dropped; valid rows around them survive"""
+    rows = [
+        [100, 100, 200, 200, 0, 90],
+        [100, 100, 200, 200, 0],  # truncated
+        [100, 100, 200, 'x', 0, 90],  # garbage value
+        [True, 100, 200, 200, 0, 90],  # bool is not a coordinate
+        [300, 300, 300, 400, 1, 80],  # zero height
+        {'unexpected': 'object'},
+        [500, 500, 600, 600, 2, 70]
+    ]
+    detections = system.parse_detection_list(rows, (1000, 1000))
+    assert [d['bbox'] for d in detections] == [(100, 100, 100, 100), (500, 500, 100, 100)]
+    assert [d['type'] for d in detections] == ['face', 'document']
+
+def test_max_detections_cap(system):
+    """No more than max_detections rows are kept, however many the model returns"""
+    system.max_detections = 3
+    rows = [[10 * i, 10 * i, 10 * i + 50, 10 * i + 50, 0, 90] for i in range(10)]
+    assert len(system.parse_detection_list(rows, (480, 640))) == 3
+    assert system.detection_schema()['maxItems'] == 3
+
+def test_analysis_request_asks_for_schema_constrained_json(system, monkeypatch):
+    """The generateContent payload carries the JSON mime type and the compact row schema"""
+    sent = []
+
+    def post(payload):
+        sent.append(payload)
+        rows = [[250, 100, 750, 400, 0, 87]]
+        return {'candidates': [{'content': {'parts': [{'text': json.dumps(rows)}]}}]}
+    monkeypatch.setattr(system, 'post_generate_content', post)
+
+    detections = system.call_gemini_analysis(np.zeros((480, 640, 3), dtype=np.uint8), 'blur faces')
+    assert [d['bbox'] for d in detections] == [(64, 120, 192, 240)]
+
+    config = sent[0]['generationConfig']
+    assert config['responseMimeType'] == 'application/json'
+    schema = config['responseSchema']
+    assert schema['type'] == 'ARRAY' and schema['maxItems'] == system.max_detections
+    assert schema['items']['minItems'] == schema['items']['maxItems'] == 6
+    assert schema['items']['items'] == {'type': 'INTEGER'}
+    assert config['maxOutputTokens'] < 1024
+
+def test_batch_schema_has_one_list_per_image(system):
+    """Batched requests wrap the per-image schema in a fixed-length outer array"""
+    schema = system.generation_config(frames=3)['responseSchema']
+    assert schema['minItems'] == schema['maxItems'] == 3
+    assert schema['items'] == system.detection_schema()
+
+def test_unstructured_mode_sends_no_schema(system):
+    """With structured output off the request falls back to free-form JSON"""
+    system.structured_output = False
+    assert 'responseSchema' not in system.generation_config()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from pimoroni_bot.tracking import BoxTracker
+
+def textured_patch():
+    """A 60x60 patch of random blocks with plenty of corners to track"""
+    blocks = np.random.RandomState(1).randint(0, 255, (12, 12), dtype=np.uint8)
+    return np.repeat(np.repeat(blocks, 5, axis=0), 5, axis=1)
+
+def frame_with_patch(x, y):
+    frame = np.full((240, 320), 128, dtype=np.uint8)
+    frame[y:y + 60, x:x + 60] = textured_patch()
+    return frame
+
+def test_box_follows_translated_patch():
+    """A box on a textured patch moves with the patch frame by frame"""
+    tracker = BoxTracker()
+    tracker.reset(frame_with_patch(100, 80), [{'label': 'face', 'bbox': (100, 80, 60, 60)}])
+    for step in range(1, 6):
+        detections = tracker.update(frame_with_patch(100 + 3 * step, 80 + 2 * step))
+    assert len(detections) == 1
+    assert detections[0]['label'] == 'face' and detections[0]['tracked']
+    x, y, w, h = detections[0]['bbox']
+    assert abs(x - 115) <= 2 and abs(y - 90) <= 2
+    assert abs(w - 60) <= 4 and abs(h - 60) <= 4
+    assert tracker.needs_detection() == (False, None)
+
+def test_lost_points_request_detection():
+    """When the patch vanishes the track is lost, keeps its last box and asks for a detection"""
+    tracker = BoxTracker()
+    tracker.reset(frame_with_patch(100, 80), [{'label': 'face', 'bbox': (100, 80, 60, 60)}])
+    tracker.update(frame_with_patch(103, 82))
+    detections = tracker.update(np.full((240, 320), 128, dtype=np.uint8))
+    assert not detections[0]['tracked']
+    assert abs(detections[0]['bbox'][0] - 103) <= 2
+    assert tracker.needs_detection() == (True, 'track_lost')
+
+def test_keyframe_age_requests_detection():
+    """Even a well-tracked box is re-detected once the keyframe is old"""
+    tracker = BoxTracker(max_keyframe_age=2)
+    assert tracker.needs_detection() == (True, 'no_keyframe')
+    frame = frame_with_patch(100, 80)
+    tracker.reset(frame, [{'label': 'face', 'bbox': (100, 80, 60, 60)}])
+    tracker.update(frame)
+    assert tracker.needs_detection() == (False, None)
+    tracker.update(frame)
+    assert tracker.needs_detection() == (True, 'keyframe_age')